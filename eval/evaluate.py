@@ -7,50 +7,81 @@ Evaluation harness:
 - Computes Contrastive Consistency for 'flip_or_invalidate' variants if both base and edited responses exist
 
 Usage:
-  python eval/evaluate.py --items_dir items --responses_dir runs/sample --out results.csv
+  python eval/evaluate.py --items_dir items --responses_dir runs/sample --out results.csv [--workers N]
 """
-import os, sys, json, argparse, re, math
+from __future__ import annotations
+
+import os, sys, json, argparse, re, math, csv
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None  # type: ignore[assignment]
 
-def load_json(p):
+def load_json(p: str | Path) -> Any:
+    if orjson is not None:
+        return orjson.loads(Path(p).read_bytes())
     with open(p, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def parse_number(s):
+def parse_number(s: str) -> float | None:
     m = re.search(r"(-?\d+(\.\d+)?)", s.replace(",", ""))
     return float(m.group(1)) if m else None
 
+# Character-level rewrites run first: "∠" -> "angle " can form a "right angle".
+_NORM_TRANS = str.maketrans({",": " ", "∠": "angle "})
+_NORM_WORDS = r"perpendicular|right angle|parallel"
+# Every remaining rewrite in one scan; branch order encodes the old pass order.
+_NORM = re.compile(
+    # 1: perpendicular-at-point -> "⊥@<pt>" (point left in place for later branches)
+    r"((?:⊥|perpendicular|right angle)\s*a(?:(tangent\s*(?:at|to|@)\s*)|t\s*(?=(?!"
+    + _NORM_WORDS + r")[a-z0-9])))"
+    r"|(perpendicular|right angle)"  # 3: -> "⊥"
+    r"|(parallel)"  # 4: -> "∥"
+    # 5: "angle a b c" -> "angle abc"; 9: a "t" that starts "tangent at" keeps that rule
+    r"|(angle\s+([a-z])\s+([a-z])\s+(?!" + _NORM_WORDS + r")([a-z])(?:(?<=t)(angent\s*(?:at|to|@)\s*))?)"
+    r"|(tangent\s*(?:at|to|@)\s*)"  # 10: -> "tangent@"
+    r"|(\s*@\s*)"  # 11: -> "@"
+    r"|(=\s*(-?\d+(?:\.\d+)?)\s*°)"  # 12: "= 20°" -> "= 20"
+    # 14: drop "°" and collapse whitespace (runs leading into "@" belong to 11)
+    r"|((?:°|\s+(?!\s*@))+)"
+)
+
+def _norm_dispatch(m: re.Match) -> str:
+    i = m.lastindex
+    if i == 14:
+        return "" if m.group(14).strip("°") == "" else " "
+    if i == 1:
+        # "⊥ atangent at" overlaps both rules: "⊥@angent@"
+        return "⊥@angent@" if m.group(2) else "⊥@"
+    if i == 3:
+        return "⊥"
+    if i == 4:
+        return "∥"
+    if i == 5:
+        # "angle a b tangent at" overlaps both rules: "angle abtangent@"
+        return f"angle {m.group(6)}{m.group(7)}{m.group(8)}" + ("angent@" if m.group(9) else "")
+    if i == 10:
+        return "tangent@"
+    if i == 11:
+        return "@"
+    return f"= {m.group(13)}"
+
+@lru_cache(maxsize=8192)
 def normalize_fact(s: str) -> str:
-    t = s.strip().lower()
-    t = t.replace(",", " ")
-    t = t.replace("∠", "angle ")
-    t = t.replace("perpendicular", "⊥").replace("right angle", "⊥")
-    t = t.replace("parallel", "∥")
-    # collapse angle tokens like "angle a b c" -> "angle abc"
-    t = re.sub(r"angle\s+([a-z])\s+([a-z])\s+([a-z])", lambda m: f"angle {''.join(m.groups())}", t)
-    t = re.sub(r"angle\s+([a-z]{3})", lambda m: f"angle {m.group(1)}", t)
-    # normalize tangent references (with or without spaces around '@')
-    t = re.sub(r"tangent\s*(?:at|to|@)\s*", "tangent@", t)
-    t = re.sub(r"\s*@\s*", "@", t)
-    # normalize perpendicular-at-point expressions
-    t = re.sub(r"⊥\s*at\s*([a-z0-9]+)", lambda m: f"⊥@{m.group(1)}", t)
-    # align degree expressions so "= 20" and "= 20°" match
-    t = re.sub(r"=\s*(-?\d+(?:\.\d+)?)\s*°", r"= \1", t)
-    t = t.replace("°", "")
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
+    t = s.strip().lower().translate(_NORM_TRANS)
+    return _NORM.sub(_norm_dispatch, t).strip()
 
 def truth_facts_from_pgdp(pgdp: dict) -> set[str]:
     facts = set()
     sym_map = {s["id"]: s for s in pgdp.get("symbols",[])}
-    line_map = {line["id"]: line for line in pgdp.get("lines", [])}
-
-    def line_points(line_id: str) -> set[str]:
-        line = line_map.get(line_id)
-        if not line:
-            return set()
-        return {line.get("p1"), line.get("p2")}
+    line_pts = {line["id"]: frozenset((line.get("p1"), line.get("p2"))) for line in pgdp.get("lines", [])}
+    no_pts: frozenset[str] = frozenset()
 
     for rel in pgdp.get("relations",[]):
         if rel.get("type")=="sym2geo":
@@ -60,7 +91,7 @@ def truth_facts_from_pgdp(pgdp: dict) -> set[str]:
                 l1,l2 = rel["target_ids"][0], rel["target_ids"][1]
                 facts.add(normalize_fact(f"{l1} ⊥ {l2}"))
                 facts.add(normalize_fact(f"{l2} ⊥ {l1}"))
-                intersection = line_points(l1) & line_points(l2)
+                intersection = line_pts.get(l1, no_pts) & line_pts.get(l2, no_pts)
                 for point in intersection:
                     if point:
                         facts.add(normalize_fact(f"right angle at {point}"))
@@ -82,43 +113,52 @@ def truth_facts_from_pgdp(pgdp: dict) -> set[str]:
                 facts.add(normalize_fact(f"{target} = {content}"))
     return facts
 
-def grounding_prf(used: list[str], truth: set[str]):
-    used_n = [normalize_fact(u) for u in used]
-    used_set = set(used_n)
-    tp = len([u for u in used_set if u in truth])
-    fp = len([u for u in used_set if u not in truth])
-    fn = len([t for t in truth if t not in used_set])
+def grounding_prf(used: list[str], truth: set[str]) -> tuple[float, float, float]:
+    used_set = {normalize_fact(u) for u in used}
+    tp = len(used_set & truth)
+    fp = len(used_set) - tp
+    fn = len(truth) - tp
     P = tp / (tp + fp) if (tp+fp)>0 else 0.0
     R = tp / (tp + fn) if (tp+fn)>0 else 0.0
     F1 = 2*P*R/(P+R) if (P+R)>0 else 0.0
     return P,R,F1
 
-def invented_parallel(used: list[str], truth: set[str]):
-    return any(("∥" in u) and (u not in truth) for u in [normalize_fact(x) for x in used])
+def invented_parallel(used_norm: tuple[str, ...], truth: set[str]) -> bool:
+    return any(("∥" in u) and (u not in truth) for u in used_norm)
 
-def tangent_missing(truth: set[str], used: list[str]):
-    needs = any("tangent@" in t for t in truth)
-    used_norm = [normalize_fact(x) for x in used]
-    has_tangent = any("tangent@" in u for u in used_norm)
-    has_perp = any("⊥" in u for u in used_norm)
-    return needs and not (has_tangent or has_perp)
+def tangent_missing(truth: set[str], used_norm: tuple[str, ...]) -> bool:
+    if not any("tangent@" in t for t in truth):
+        return False
+    return not any(("tangent@" in u) or ("⊥" in u) for u in used_norm)
 
-def arc_chord_conflict(truth: set[str], used: list[str]):
-    used_norm = " ".join([normalize_fact(x) for x in used])
-    mentions_arc = "arc" in used_norm
-    mentions_angle_id = "angle" in used_norm
-    has_measures = any(("=" in t and "°" in t) for t in truth)
-    return (mentions_arc or mentions_angle_id) and not has_measures
+def arc_chord_conflict(truth: set[str], used_norm: tuple[str, ...]) -> bool:
+    if any(("=" in t and "°" in t) for t in truth):
+        return False
+    return any(("arc" in u) or ("angle" in u) for u in used_norm)
 
-def label_anchor_violation(used: list[str]):
-    used_norm = " ".join([normalize_fact(x) for x in used])
-    return ("label position" in used_norm) or ("by where the label" in used_norm)
+def label_anchor_violation(used_norm: tuple[str, ...]) -> bool:
+    joined = " ".join(used_norm)
+    return ("label position" in joined) or ("by where the label" in joined)
 
-def mentions_visual_scale(pred_text: str):
-    t = pred_text.lower()
-    return any(k in t for k in ["by scale", "looks equal", "appears equal", "not to scale but", "visually"])
+_SCALE_KEYS = ("by scale", "looks equal", "appears equal", "not to scale but", "visually")
+_SCALE_RE = re.compile("|".join(re.escape(k) for k in _SCALE_KEYS))
 
-def evaluate_variant(item_id, variant, gold, pgdp, resp_path):
+def mentions_visual_scale(resp: object) -> bool:
+    # walks every string in the response (values of nested lists/dicts too)
+    if isinstance(resp, str):
+        return _SCALE_RE.search(resp.lower()) is not None
+    if isinstance(resp, dict):
+        return any(mentions_visual_scale(v) for v in resp.values())
+    if isinstance(resp, list):
+        return any(mentions_visual_scale(v) for v in resp)
+    return False
+
+# Below this many items the default run skips the process pool: startup costs more.
+POOL_MIN_ITEMS = 4
+
+CSV_COLUMNS = ("item", "variant", "exists", "acc", "P", "R", "F1", "flags")
+
+def evaluate_variant(item_id: str, variant: dict, gold: dict, truth: set[str], resp_path: Path) -> dict:
     if not resp_path.exists():
         return {"exists": False}
     resp = load_json(resp_path)
@@ -126,88 +166,98 @@ def evaluate_variant(item_id, variant, gold, pgdp, resp_path):
     gold_val = gold["answer"]["value"]; tol = float(gold["answer"].get("tol",0))
     acc = int(pred is not None and abs(pred - gold_val) <= tol)
     used = resp.get("figure_facts_used", [])
-    truth = truth_facts_from_pgdp(pgdp)
+    used_norm = tuple(normalize_fact(u) for u in used)
     P,R,F1 = grounding_prf(used, truth)
     flags = []
-    if invented_parallel(used, truth): flags.append("GP")
-    if tangent_missing(truth, used):   flags.append("TG")
-    if arc_chord_conflict(truth, used):flags.append("AC")
-    if label_anchor_violation(used):   flags.append("LC")
-    if mentions_visual_scale(json.dumps(resp)): flags.append("NS")
+    if invented_parallel(used_norm, truth): flags.append("GP")
+    if tangent_missing(truth, used_norm):   flags.append("TG")
+    if arc_chord_conflict(truth, used_norm):flags.append("AC")
+    if label_anchor_violation(used_norm):   flags.append("LC")
+    if mentions_visual_scale(resp):     flags.append("NS")
     return {"exists": True, "acc": acc, "P": P, "R": R, "F1": F1, "flags": ";".join(flags), "pred": pred}
 
-def main():
+def _process_item(item_dir: Path, responses_dir: Path) -> list[tuple]:
+    rows = []
+    item_id = item_dir.name
+    gold = load_json(item_dir / f"{item_id}.gold.json")["gold"]
+    pgdp = load_json(item_dir / f"{item_id}.pgdp.json")
+    truth = truth_facts_from_pgdp(pgdp)
+    variants = load_json(item_dir / f"{item_id}.variants.json")
+    preds = {}
+    metrics = {}
+    for v in variants:
+        vid = v["variant_id"]
+        resp_path = responses_dir / f"{vid}.json"
+        res = evaluate_variant(item_id, v, gold, truth, resp_path)
+        rows.append((
+            item_id, vid,
+            int(res.get("exists",False)),
+            res.get("acc",0),
+            f'{res.get("P",0):.3f}', f'{res.get("R",0):.3f}', f'{res.get("F1",0):.3f}',
+            res.get("flags","")
+        ))
+        if res.get("exists"):
+            preds[vid] = res.get("pred")
+            metrics[vid] = res
+    base_vid = next((v["variant_id"] for v in variants if v["variant_id"].endswith("full_txtimg")), None)
+    mr_vid   = next((v["variant_id"] for v in variants if v["variant_id"].endswith("mark_removed")), None)
+    if base_vid and mr_vid and base_vid in preds and mr_vid in preds:
+        consistent = int(preds[base_vid] != preds[mr_vid])
+        rows.append((item_id, "contrastive_check", 1, consistent, "", "", "", "CONSISTENCY"))
+
+    def acc_for(vid: str) -> int | None:
+        res = metrics.get(vid)
+        return res.get("acc") if res else None
+
+    img_vid = next((v["variant_id"] for v in variants if v["variant_id"].endswith("img_only")), None)
+    txt_vid = next((v["variant_id"] for v in variants if v["variant_id"].endswith("txt_only")), None)
+
+    base_acc = acc_for(base_vid) if base_vid else None
+    img_acc = acc_for(img_vid) if img_vid else None
+    txt_acc = acc_for(txt_vid) if txt_vid else None
+
+    delta_img: int | None = (img_acc - base_acc) if (base_acc is not None and img_acc is not None) else None
+    delta_txt: int | None = (txt_acc - base_acc) if (base_acc is not None and txt_acc is not None) else None
+
+    delta_img_str = f"{delta_img:+d}" if isinstance(delta_img, int) else (f"{delta_img:+.2f}" if isinstance(delta_img, float) and delta_img is not None else "")
+    delta_txt_str = f"{delta_txt:+d}" if isinstance(delta_txt, int) else (f"{delta_txt:+.2f}" if isinstance(delta_txt, float) and delta_txt is not None else "")
+
+    sensitivity_exists = 1 if base_acc is not None else 0
+    rows.append((item_id, "variant_sensitivity", sensitivity_exists, "",
+                 delta_img_str, delta_txt_str, "", "SENSITIVITY"))
+    return rows
+
+def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--items_dir", required=True)
     ap.add_argument("--responses_dir", required=True)
     ap.add_argument("--out", required=True)
+    ap.add_argument("--workers", type=int, default=None, help=f"Worker processes (default: CPU count, in-process below {POOL_MIN_ITEMS} items; 1 runs in-process)")
     args = ap.parse_args()
 
     items_dir = Path(args.items_dir)
-    rows = []
-    for item_dir in items_dir.iterdir():
-        if not item_dir.is_dir(): continue
-        item_id = item_dir.name
-        gold = load_json(item_dir / f"{item_id}.gold.json")["gold"]
-        pgdp = load_json(item_dir / f"{item_id}.pgdp.json")
-        variants = load_json(item_dir / f"{item_id}.variants.json")
-        preds = {}
-        metrics = {}
-        for v in variants:
-            vid = v["variant_id"]
-            resp_path = Path(args.responses_dir) / f"{vid}.json"
-            res = evaluate_variant(item_id, v, gold, pgdp, resp_path)
-            rows.append({
-                "item": item_id,"variant": vid,
-                "exists": int(res.get("exists",False)),
-                "acc": res.get("acc",0),
-                "P": f'{res.get("P",0):.3f}', "R": f'{res.get("R",0):.3f}', "F1": f'{res.get("F1",0):.3f}',
-                "flags": res.get("flags","")
-            })
-            if res.get("exists"):
-                preds[vid] = res.get("pred")
-                metrics[vid] = res
-        base_vid = next((v["variant_id"] for v in variants if v["variant_id"].endswith("full_txtimg")), None)
-        mr_vid   = next((v["variant_id"] for v in variants if v["variant_id"].endswith("mark_removed")), None)
-        if base_vid and mr_vid and base_vid in preds and mr_vid in preds:
-            consistent = int(preds[base_vid] != preds[mr_vid])
-            rows.append({"item": item_id, "variant": "contrastive_check",
-                         "exists": 1, "acc": consistent, "P":"", "R":"", "F1":"", "flags": "CONSISTENCY"})
-
-        def acc_for(vid: str):
-            res = metrics.get(vid)
-            return res.get("acc") if res else None
-
-        img_vid = next((v["variant_id"] for v in variants if v["variant_id"].endswith("img_only")), None)
-        txt_vid = next((v["variant_id"] for v in variants if v["variant_id"].endswith("txt_only")), None)
-
-        base_acc = acc_for(base_vid) if base_vid else None
-        img_acc = acc_for(img_vid) if img_vid else None
-        txt_acc = acc_for(txt_vid) if txt_vid else None
-
-        delta_img = (img_acc - base_acc) if (base_acc is not None and img_acc is not None) else None
-        delta_txt = (txt_acc - base_acc) if (base_acc is not None and txt_acc is not None) else None
-
-        delta_img_str = f"{delta_img:+d}" if isinstance(delta_img, int) else (f"{delta_img:+.2f}" if isinstance(delta_img, float) and delta_img is not None else "")
-        delta_txt_str = f"{delta_txt:+d}" if isinstance(delta_txt, int) else (f"{delta_txt:+.2f}" if isinstance(delta_txt, float) and delta_txt is not None else "")
-
-        sensitivity_exists = 1 if base_acc is not None else 0
-        rows.append({
-            "item": item_id,
-            "variant": "variant_sensitivity",
-            "exists": sensitivity_exists,
-            "acc": "",
-            "P": delta_img_str,
-            "R": delta_txt_str,
-            "F1": "",
-            "flags": "SENSITIVITY"
-        })
-
+    with os.scandir(items_dir) as it:
+        item_dirs = [Path(e.path) for e in it if e.is_dir()]
+    process = partial(_process_item, responses_dir=Path(args.responses_dir))
     outp = Path(args.out); outp.parent.mkdir(parents=True, exist_ok=True)
-    with open(outp, "w", encoding="utf-8") as f:
-        f.write("item,variant,exists,acc,P,R,F1,flags\n")
-        for r in rows:
-            f.write(f'{r["item"]},{r["variant"]},{r["exists"]},{r["acc"]},{r["P"]},{r["R"]},{r["F1"]},{r["flags"]}\n')
+    # Rows stream into a temp file that replaces --out only once every item succeeded,
+    # so a failed run never leaves a results file that looks complete.
+    tmp = outp.with_name(outp.name + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(CSV_COLUMNS)
+            if args.workers == 1 or (args.workers is None and len(item_dirs) < POOL_MIN_ITEMS):
+                for item_rows in map(process, item_dirs):
+                    writer.writerows(item_rows)
+            else:
+                with ProcessPoolExecutor(max_workers=args.workers) as ex:
+                    for item_rows in ex.map(process, item_dirs, chunksize=8):
+                        writer.writerows(item_rows)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, outp)
     print(f"[evaluate] wrote {outp}")
 
 if __name__ == "__main__":
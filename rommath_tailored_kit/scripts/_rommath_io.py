@@ -0,0 +1,28 @@
+"""JSON helpers shared by rommath_scraper_tailored.py and rommath_offline_demo.py."""
+import json
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None
+
+def loads(data: bytes):
+    # both parsers accept UTF-8 bytes
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def write_json(path: Path, obj, ensure_ascii: bool = True) -> None:
+    # 2-space indent; ensure_ascii as in json.dumps. orjson has no ASCII-escaping
+    # mode, so only the UTF-8 files go through it.
+    if orjson is not None and not ensure_ascii:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        path.write_text(json.dumps(obj, ensure_ascii=ensure_ascii, indent=2), encoding="utf-8")
+
+def write_variants(d: Path, item_id: str) -> None:
+    variants = [
+        {"variant_id": f"{item_id}_full_txtimg", "text_included": True,  "image": "assets/figure.png"},
+        {"variant_id": f"{item_id}_img_only",    "text_included": False, "image": "assets/figure.png"},
+        {"variant_id": f"{item_id}_txt_only",    "text_included": True,  "image": None}
+    ]
+    write_json(d/"variants.json", variants)
@@ -9,9 +9,11 @@ This is for wiring tests; for full data, run rommath_scraper_tailored.py against
 Usage:
   python scripts/rommath_offline_demo.py --out ./out_demo
 """
-import argparse, json, os, re
+import argparse, os, re
 from pathlib import Path
 
+from _rommath_io import loads, write_json, write_variants
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--out", required=True)
@@ -20,7 +22,8 @@ def main():
 
     base = Path(__file__).resolve().parents[1]
     seeds_path = base / "seeds" / "rommath_seed_examples.jsonl"
-    rows = [json.loads(line) for line in seeds_path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    with open(seeds_path, "rb") as f:
+        rows = [loads(line) for line in f if line.strip()]
 
     PROMPT_CONTRACT = """
 Instructions:
@@ -62,7 +65,7 @@ ASSUMPTIONS:
             "subset": row.get("subset"),
             "split": row.get("split")
         }
-        (d/"gold.json").write_text(json.dumps(gold, ensure_ascii=False, indent=2), encoding="utf-8")
+        write_json(d/"gold.json", gold, ensure_ascii=False)
 
         src = {
             "split_json_url": "(demo)",
@@ -70,7 +73,7 @@ ASSUMPTIONS:
             "image_url": row.get("image_url"),
             "dataset": "yilun-org/RoMMath (reference URL only)"
         }
-        (d/"source.json").write_text(json.dumps(src, ensure_ascii=False, indent=2), encoding="utf-8")
+        write_json(d/"source.json", src, ensure_ascii=False)
         (d/"external_image_url.txt").write_text((row.get("image_url") or "")+"\n", encoding="utf-8")
 
         # No internet: we can't download the image. Keep URL.
@@ -89,18 +92,13 @@ ASSUMPTIONS:
                 "diagnostic_hint": row.get("diagnostic_hint")
             }
         }
-        (d/"scene.yaml").write_text(json.dumps(scene, indent=2), encoding="utf-8")
+        write_json(d/"scene.yaml", scene)
 
-        variants = [
-            {"variant_id": f"{item_id}_full_txtimg", "text_included": True,  "image": "assets/figure.png"},
-            {"variant_id": f"{item_id}_img_only",    "text_included": False, "image": "assets/figure.png"},
-            {"variant_id": f"{item_id}_txt_only",    "text_included": True,  "image": None}
-        ]
-        (d/"variants.json").write_text(json.dumps(variants, indent=2), encoding="utf-8")
+        write_variants(d, item_id)
 
         manifest.append({"id": item_id, "dir": str(d), "subset": row.get("subset"), "split": row.get("split")})
 
-    (out_dir/"manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    write_json(out_dir/"manifest.json", manifest)
     print(f"Demo built with {len(manifest)} items at {out_dir}")
 
 if __name__ == "__main__":
@@ -19,11 +19,13 @@ Usage:
       --diagnostic-only true \
       --append-prompt-contract true
 """
-import argparse, os, json, re, sys
+import argparse, asyncio, itertools, os, re, shutil, sys
 from pathlib import Path
 import httpx
 from tqdm import tqdm
 
+from _rommath_io import loads, write_json, write_variants
+
 RAW_BASE = "https://huggingface.co/datasets/yilun-org/RoMMath/raw/main/"
 RESOLVE_BASE = "https://huggingface.co/datasets/yilun-org/RoMMath/resolve/main/"
 SPLIT_FILE = {"validation": "validation.json", "test": "test.json"}
@@ -52,7 +54,7 @@ def fetch_split_json(split: str, client: httpx.Client):
     url = RAW_BASE + SPLIT_FILE[split]
     r = client.get(url, timeout=60)
     r.raise_for_status()
-    return r.json()
+    return loads(r.content)
 
 def build_item_dir(base_out: Path, item_id: str) -> Path:
     d = base_out / "items" / re.sub(r"[^a-zA-Z0-9._-]+","-", item_id)
@@ -64,34 +66,47 @@ def resolve_image_url(row):
     rel = row.get("image","").replace("./RoMMath/","")
     return RESOLVE_BASE + rel
 
+# Per-category (weight, keywords); a category scores its weight once if any keyword appears.
+DIAGNOSTIC_KEYWORDS = {
+    "tangent-secant": (2, ("tangent", "secant", "point of tangency", "tangent-chord")),
+    "arc-vs-chord": (2, ("arc", "chord", "inscribed angle", "central angle", "intercepted arc")),
+    "invented-parallel-perp": (2, ("parallel", "perpendicular", "∥", "⟂", "similar triangles", "similarity")),
+    "label-anchoring": (1, ("midpoint", "foot of perpendicular", "bisect", "label", "marked", "tick")),
+    "not-to-scale-vs-marked": (1, ("isosceles", "equilateral", "ab = ac", "equal sides", "not to scale")),
+}
+CATS = tuple(DIAGNOSTIC_KEYWORDS)
+_WEIGHTS = tuple(w for w, _ in DIAGNOSTIC_KEYWORDS.values())
+_KEYWORD_CATEGORY = {k: i for i, (_, kws) in enumerate(DIAGNOSTIC_KEYWORDS.values()) for k in kws}
+# Zero-width lookahead so overlapping keywords ("foot of perpendicular" / "perpendicular")
+# are all seen in a single scan of the text.
+_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(_KEYWORD_CATEGORY, key=len, reverse=True)) + "))"
+)
+
 def diagnostic_map(text: str):
     # Very simple keyword heuristics per category
     t = (text or "").lower()
-    scores = {
-        "tangent-secant": 0,
-        "arc-vs-chord": 0,
-        "invented-parallel-perp": 0,
-        "label-anchoring": 0,
-        "not-to-scale-vs-marked": 0
-    }
-    if any(k in t for k in ["tangent", "secant", "point of tangency", "tangent-chord"]):
-        scores["tangent-secant"] += 2
-    if any(k in t for k in ["arc", "chord", "inscribed angle", "central angle", "intercepted arc"]):
-        scores["arc-vs-chord"] += 2
-    if any(k in t for k in ["parallel", "perpendicular", "∥", "⟂", "similar triangles", "similarity"]):
-        scores["invented-parallel-perp"] += 2
-    if any(k in t for k in ["midpoint", "foot of perpendicular", "bisect", "label", "marked", "tick"]):
-        scores["label-anchoring"] += 1
-    if any(k in t for k in ["isosceles", "equilateral", "ab = ac", "equal sides", "not to scale"]):
-        scores["not-to-scale-vs-marked"] += 1
-    # Pick top-scoring category (ties -> arbitrary stable order)
-    cat = None
-    best = 0
-    for k,v in scores.items():
-        if v > best:
-            best = v
-            cat = k
-    return {"category": cat, "scores": scores}
+    scores = [0] * len(CATS)
+    for i in {_KEYWORD_CATEGORY[m.group(1)] for m in _KEYWORD_RE.finditer(t)}:
+        scores[i] = _WEIGHTS[i]
+    # Pick top-scoring category (ties -> first in CATS order)
+    best = max(range(len(CATS)), key=scores.__getitem__)
+    cat = CATS[best] if scores[best] else None
+    return {"category": cat, "scores": dict(zip(CATS, scores))}
+
+async def download_images(jobs, headers, concurrency: int = 16):
+    # jobs: (img_url, item_dir) pairs; at most `concurrency` requests in flight
+    sem = asyncio.Semaphore(max(1, concurrency))
+    async with httpx.AsyncClient(headers=headers, follow_redirects=True) as client:
+        async def fetch(img_url: str, d: Path):
+            async with sem:
+                try:
+                    r = await client.get(img_url, timeout=60)
+                    r.raise_for_status()
+                    (d/"assets"/"figure.png").write_bytes(r.content)
+                except Exception as e:
+                    (d/"download_error.txt").write_text(str(e), encoding="utf-8")
+        await asyncio.gather(*(fetch(url, d) for url, d in jobs))
 
 def main():
     ap = argparse.ArgumentParser()
@@ -102,10 +117,11 @@ def main():
     ap.add_argument("--out", required=True)
     ap.add_argument("--diagnostic-only", default="true", choices=["true","false"])
     ap.add_argument("--append-prompt-contract", default="true", choices=["true","false"])
+    ap.add_argument("--concurrency", type=int, default=16, help="Max simultaneous image downloads")
     args = ap.parse_args()
 
     out_dir = Path(args.out); out_dir.mkdir(parents=True, exist_ok=True)
-    subset_whitelist = [s.strip() for s in args.subset.split(",") if s.strip()]
+    subset_whitelist = frozenset(s.strip() for s in args.subset.split(",") if s.strip())
 
     headers = {}
     token = os.environ.get("HF_TOKEN")
@@ -114,19 +130,15 @@ def main():
 
     with httpx.Client(headers=headers, follow_redirects=True) as client:
         rows = fetch_split_json(args.split, client)
-        picked = []
-        for row in rows:
-            rid = row.get("id","")
-            subset = row.get("subset","")
-            if not rid.startswith(args.id_prefix): 
-                continue
-            if subset_whitelist and subset not in subset_whitelist:
-                continue
-            picked.append(row)
-            if args.limit>0 and len(picked)>=args.limit:
-                break
+        matching = (
+            row for row in rows
+            if row.get("id","").startswith(args.id_prefix)
+            and (not subset_whitelist or row.get("subset","") in subset_whitelist)
+        )
+        picked = list(itertools.islice(matching, args.limit if args.limit>0 else None))
 
         manifest = []
+        downloads = []
         for row in tqdm(picked, desc="Importing"):
             item_id = row["id"]
             d = build_item_dir(out_dir, item_id)
@@ -147,7 +159,7 @@ def main():
                 "subset": row.get("subset"),
                 "split": args.split,
             }
-            (d/"gold.json").write_text(json.dumps(gold, ensure_ascii=False, indent=2), encoding="utf-8")
+            write_json(d/"gold.json", gold, ensure_ascii=False)
 
             # source + image url
             img_url = resolve_image_url(row)
@@ -157,30 +169,17 @@ def main():
                 "image_url": img_url,
                 "dataset": "yilun-org/RoMMath"
             }
-            (d/"source.json").write_text(json.dumps(source, ensure_ascii=False, indent=2), encoding="utf-8")
+            write_json(d/"source.json", source, ensure_ascii=False)
             (d/"external_image_url.txt").write_text(img_url+"\n", encoding="utf-8")
 
-            # download image
-            try:
-                r = client.get(img_url, timeout=60)
-                r.raise_for_status()
-                (d/"assets").mkdir(exist_ok=True, parents=True)
-                (d/"assets"/"figure.png").write_bytes(r.content)
-            except Exception as e:
-                (d/"download_error.txt").write_text(str(e), encoding="utf-8")
-
             # diagnostic mapping
             diag = diagnostic_map(row.get("question","") or "")
-            (d/"diagnostic.json").write_text(json.dumps(diag, indent=2), encoding="utf-8")
+            write_json(d/"diagnostic.json", diag)
 
             # optional filter: keep only mapped
             if args.diagnostic_only == "true" and not diag.get("category"):
                 # Remove directory if created
-                for root, dirs, files in os.walk(d, topdown=False):
-                    for name in files: os.remove(os.path.join(root, name))
-                    for name in dirs: os.rmdir(os.path.join(root, name))
-                try: os.rmdir(d)
-                except OSError: pass
+                shutil.rmtree(d, ignore_errors=True)
                 continue
 
             # scene stub (raster reference; you will replace with vector later)
@@ -199,15 +198,13 @@ def main():
                     "diagnostic_scores": diag.get("scores")
                 }
             }
-            (d/"scene.yaml").write_text(json.dumps(scene_stub, indent=2), encoding="utf-8")
+            write_json(d/"scene.yaml", scene_stub)
 
             # minimal variants for modality ablation
-            variants = [
-                {"variant_id": f"{item_id}_full_txtimg", "text_included": True,  "image": "assets/figure.png"},
-                {"variant_id": f"{item_id}_img_only",    "text_included": False, "image": "assets/figure.png"},
-                {"variant_id": f"{item_id}_txt_only",    "text_included": True,  "image": None}
-            ]
-            (d/"variants.json").write_text(json.dumps(variants, indent=2), encoding="utf-8")
+            write_variants(d, item_id)
+
+            # image is fetched after the loop, concurrently with the other kept items
+            downloads.append((img_url, d))
 
             manifest.append({
                 "id": item_id,
@@ -217,7 +214,9 @@ def main():
                 "diagnostic_category": diag.get("category")
             })
 
-        (out_dir/"manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        asyncio.run(download_images(downloads, headers, args.concurrency))
+
+        write_json(out_dir/"manifest.json", manifest)
         print(f"Imported {len(manifest)} items to {out_dir}")
 
 if __name__ == "__main__":
@@ -5,3 +5,53 @@ def test_grounding_prf_basic():
     used  = ["OA ⟂ PA", "∠PAB = 31°"]
     P,R,F1 = grounding_prf(used, truth)
     assert 0.4 <= P <= 1.0 and 0.4 <= R <= 1.0
+
+from eval.evaluate import mentions_visual_scale
+def test_mentions_visual_scale_scans_nested_strings():
+    assert mentions_visual_scale({"explanation": "AB Looks Equal to AC", "final_answer": "5"})
+    assert mentions_visual_scale({"assumptions": ["drawn visually"]})
+    assert not mentions_visual_scale({"final_answer": "31°", "figure_facts_used": ["OA ⟂ PA"]})
+
+import pytest
+from eval.evaluate import normalize_fact
+@pytest.mark.parametrize("raw, expected", [
+    # case, commas and surrounding/inner whitespace
+    ("  OA, PA  ", "oa pa"),
+    ("a \t  b", "a b"),
+    # perpendicular / right angle / parallel words
+    ("Perpendicular", "⊥"),
+    ("OA right angle PA", "oa ⊥ pa"),
+    ("AB parallel CD", "ab ∥ cd"),
+    # ∠ and spaced angle names
+    ("∠PAB", "angle pab"),
+    ("angle a b c", "angle abc"),
+    ("∠ A B C = 30 °", "angle abc = 30"),
+    ("angle a b perpendicular", "angle a b ⊥"),
+    # tangent and @ spellings
+    ("PA tangent at A", "pa tangent@a"),
+    ("PA tangent to A", "pa tangent@a"),
+    ("PA Tangent @ A", "pa tangent@a"),
+    ("P @ A", "p@a"),
+    ("tangent at @ a", "tangent@@a"),
+    # perpendicular at a point
+    ("⊥ at A", "⊥@a"),
+    ("right angle at O", "⊥@o"),
+    ("perpendicular at p", "⊥@p"),
+    ("right angle atx1", "⊥@x1"),
+    ("⊥ at parallel", "⊥ at ∥"),
+    # overlaps between the ⊥-at and tangent rules
+    ("⊥ at tangent at A", "⊥@tangent@a"),
+    ("⊥ atangent at B", "⊥@angent@b"),
+    # overlaps between the spaced-angle and tangent rules
+    ("angle a b tangent at c", "angle abtangent@c"),
+    ("angle a b tangent to c", "angle abtangent@c"),
+    ("angle a b tangent @ c", "angle abtangent@c"),
+    ("angle a b tangents", "angle abtangents"),
+    # degrees
+    ("∠ABC = 20°", "angle abc = 20"),
+    ("x = -3.5 °", "x = -3.5"),
+    ("AB = 5", "ab = 5"),
+    ("90°", "90"),
+])
+def test_normalize_fact_rules(raw, expected):
+    assert normalize_fact(raw) == expected
@@ -0,0 +1,54 @@
+import functools
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+from tools.make_raster_variants import RasterCanvas, _rotate, apply_operation
+
+def _canvas_rotations(arr, ops):
+    canvas = RasterCanvas(arr.copy())
+    for op in ops:
+        apply_operation(canvas, dict(op, type="rotate"))
+    return np.asarray(canvas.image())
+
+def _sequential_rotations(arr, ops):
+    # one Image.rotate (+ keep_size crop/letterbox) per op, as before rotations were queued
+    return np.asarray(functools.reduce(_rotate, ops, Image.fromarray(arr, "RGBA")))
+
+# translucent noise: any re-sampling or premultiplication shows up
+NOISE = np.random.default_rng(0).integers(0, 256, (37, 53, 4), dtype=np.uint8)
+
+@pytest.mark.parametrize("ops", [
+    [{"angle": 30, "expand": False}, {"angle": 20}],
+    [{"angle": 10, "keep_size": True}, {"angle": 20, "keep_size": True}],
+    [{"angle": 90}, {"angle": 180}, {"angle": -90}],
+    [{"angle": 90}, {"angle": 180}, {"angle": 30}],
+    [{"angle": 25}, {"angle": 90}, {"angle": -270, "expand": False}],
+])
+def test_rotation_chains_that_clip_or_transpose_match_sequential(ops):
+    assert np.array_equal(_canvas_rotations(NOISE, ops), _sequential_rotations(NOISE, ops))
+
+@pytest.mark.parametrize("ops", [
+    [{"angle": 30}, {"angle": 40}],
+    [{"angle": 15}, {"angle": 20, "keep_size": True}],
+])
+def test_folded_rotation_chain_matches_sequential_up_to_resampling(ops):
+    # expand=True runs are resampled once instead of per step: same frame, near-equal pixels
+    yy, xx = np.mgrid[0:37, 0:53]
+    gradient = np.stack([xx * 4, yy * 6, (xx + yy) * 2, np.full_like(xx, 255)], -1).astype(np.uint8)
+    folded = _canvas_rotations(gradient, ops).astype(int)
+    sequential = _sequential_rotations(gradient, ops).astype(int)
+    assert folded.shape == sequential.shape
+    inside = (folded[..., 3] == 255) & (sequential[..., 3] == 255)
+    assert np.abs(folded - sequential)[inside].mean() < 2
+
+def test_draw_after_rotation_lands_on_the_rotated_image():
+    line = {"type": "draw_line", "points": [2, 3, 40, 30], "width": 3, "color": [255, 0, 0, 255]}
+    ops = [line, {"type": "rotate", "angle": 90}, line]
+    canvas = RasterCanvas(NOISE.copy())
+    for op in ops:
+        apply_operation(canvas, op)
+    img = Image.fromarray(NOISE, "RGBA")
+    ImageDraw.Draw(img, "RGBA").line(line["points"], fill=(255, 0, 0, 255), width=3)
+    img = _rotate(img, {"angle": 90})
+    ImageDraw.Draw(img, "RGBA").line(line["points"], fill=(255, 0, 0, 255), width=3)
+    assert np.array_equal(np.asarray(canvas.image()), np.asarray(img))
@@ -0,0 +1,78 @@
+import textwrap
+import yaml
+from tools.make_variants import SceneIndex, _Dumper, apply_ops
+
+def _scene():
+    return {
+        "symbols": [
+            {"id": "par_L1_L2", "type": "parallel", "targets": ["L1", "L2"]},
+            {"id": "tick", "type": "tick"},
+            {"id": "dup", "type": "tick"},
+            {"id": "dup", "type": "tick2"},
+        ],
+        "texts": [
+            {"id": "t1", "string": "A"},
+            {"id": "t2", "string": "B", "offset": [1, 2]},
+            {"id": "t3", "string": "30°"},
+        ],
+        "relations": [
+            {"type": "sym2geo", "symbol_id": "par_L1_L2", "target_ids": ["L1", "L2"]},
+            {"type": "sym2geo", "symbol_id": "tick", "target_ids": ["L1"]},
+            {"type": "text2geo", "text_id": "t3", "target_id": "ang"},
+            {"type": "sym2geo", "symbol_id": "dup", "target_ids": ["L2"]},
+            {"type": "text2geo", "text_id": "t1", "target_id": "A"},
+        ],
+    }
+
+def test_scene_index_edits_compact_to_expected_yaml():
+    # removals tombstone entries; later ops must still find the right positions
+    ops = [
+        "toggle_parallel:L2,L1:remove",
+        "remove_symbol:t3",
+        "nudge:t2:3,-4",
+        "swap:t1,t2",
+        "toggle_perpendicular:L3,L1:add",
+        "toggle_perpendicular:L1,L3:add",
+        "remove_symbol:dup",
+        "nudge:t1:0.5,0",
+        "toggle_parallel:L4,L5:add",
+        "remove_symbol:perp_L1_L3",
+    ]
+    scene, _ = apply_ops(SceneIndex(_scene()), ops)
+    dumped = yaml.dump(scene.compact(), Dumper=_Dumper, sort_keys=False, allow_unicode=True)
+    assert dumped == textwrap.dedent("""\
+        symbols:
+        - id: tick
+          type: tick
+        - id: par_L4_L5
+          type: parallel
+          targets: &id001
+          - L4
+          - L5
+        texts:
+        - id: t1
+          string: B
+          offset:
+          - 0.5
+          - 0.0
+        - id: t2
+          string: A
+          offset:
+          - 4.0
+          - -2.0
+        relations:
+        - type: sym2geo
+          symbol_id: tick
+          target_ids:
+          - L1
+        - type: text2geo
+          text_id: t1
+          target_id: A
+        - type: sym2geo
+          symbol_id: par_L4_L5
+          target_ids: *id001
+        """)
+
+def test_scene_index_removal_keeps_all_three_lists():
+    scene, _ = apply_ops(SceneIndex({"symbols": []}), ["remove_symbol:missing"])
+    assert scene.compact() == {"symbols": [], "texts": [], "relations": []}
@@ -0,0 +1,91 @@
+import re
+import pytest
+from tools import validate_gold
+from tools.validate_gold import measure_text_ids
+
+def _texts(*strings):
+    return [{"id": f"t{i}", "string": s} for i, s in enumerate(strings)]
+
+MEASURE_CASES = [
+    [],
+    _texts("A", "B", "O"),  # no "°"/"=": prefilter path
+    _texts("30°", "x = 5", "A"),
+    _texts("3", "° here", "=", "4"),  # a measure must not span the join between texts
+    _texts("", "12 °", ""),  # empty strings at the boundaries
+    _texts("A", "B", "C = 7"),  # match in the last text
+    _texts("angle = x", "°", "5°5"),
+    [{"id": "t0"}, {"id": "t1", "string": "45°"}],  # missing string
+]
+
+def _scan_each(texts, pattern):
+    return {t["id"] for t in texts if pattern.search(t.get("string", ""))}
+
+@pytest.mark.parametrize("texts", MEASURE_CASES)
+def test_measure_text_ids_matches_per_text_scan(texts):
+    assert measure_text_ids(texts) == _scan_each(texts, validate_gold.MEASURE_PATTERN)
+
+@pytest.mark.parametrize("texts", MEASURE_CASES)
+def test_measure_text_ids_same_with_re_and_re2(texts, monkeypatch):
+    re2 = pytest.importorskip("re2")
+    expected = _scan_each(texts, re.compile(validate_gold._MEASURE_SOURCE, re.ASCII))
+    monkeypatch.setattr(validate_gold, "MEASURE_PATTERN", re2.compile(validate_gold._MEASURE_SOURCE))
+    assert measure_text_ids(texts) == expected
+
+import json, sys
+import yaml
+from tools.validate_gold import validate_scene_data, validate_variants_data
+
+BAD_SCENE = {
+    "symbols": [{"id": "s1"}, {"id": "s2"}, {"id": "s3"}],
+    "texts": [{"id": "m1", "string": "30°"}, {"id": "m2", "string": "AB = 4"}, {"id": "lbl", "string": "A"}],
+    "relations": [{"type": "sym2geo", "symbol_id": "s2"}],
+}
+
+def test_scene_linking_problems_reported_together():
+    with pytest.raises(AssertionError) as info:
+        validate_scene_data(BAD_SCENE, "bad/scene.yaml")
+    assert str(info.value).splitlines() == [
+        "Unlinked symbols in bad/scene.yaml: ['s1', 's3']",
+        "Unlinked measure texts in bad/scene.yaml: ['m1', 'm2']",
+    ]
+
+def test_variant_problems_reported_together(tmp_path):
+    variants = [
+        {"variant_id": "v_missing", "expected_effect": "flip_or_invalidate"},
+        {"variant_id": "v_ok", "expected_effect": "flip_or_invalidate", "decisive_symbol": "s1"},
+        {"variant_id": "v_unknown", "expected_effect": "flip_or_invalidate", "decisive_symbol": "nope"},
+    ]
+    path = tmp_path / "x.variants.json"
+    path.write_text(json.dumps(variants))
+    with pytest.raises(AssertionError) as info:
+        validate_variants_data(BAD_SCENE, "bad/scene.yaml", path)
+    assert str(info.value).splitlines() == [
+        "Variant v_missing is missing decisive_symbol despite flip_or_invalidate",
+        "Variant v_unknown references decisive_symbol 'nope' not present in base scene bad/scene.yaml",
+    ]
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_main_raises_aggregated_error_serially_and_from_pool(tmp_path, monkeypatch, workers):
+    # the pool only reports pass/fail; main re-runs the failing item to raise its error
+    for name in ("A1", "A2", "A3", "A4"):
+        (tmp_path / name).mkdir()
+        scene = BAD_SCENE if name == "A3" else {"symbols": [], "texts": [], "relations": []}
+        (tmp_path / name / "scene.yaml").write_text(yaml.safe_dump(scene))
+    monkeypatch.setattr(sys, "argv", [
+        "validate_gold.py", "--items_dir", str(tmp_path), "--schema_dir", str(tmp_path / "no_schema"), "--workers", workers,
+    ])
+    with pytest.raises(AssertionError) as info:
+        validate_gold.main()
+    message = str(info.value)
+    assert "Unlinked symbols in" in message and "['s1', 's3']" in message
+    assert "Unlinked measure texts in" in message and "['m1', 'm2']" in message
+
+from tools.validate_gold import ERROR_ID_LIMIT, format_ids
+
+def test_format_ids_truncates_past_the_limit():
+    ids = [f"s{i:02d}" for i in range(ERROR_ID_LIMIT + 1)]
+    shuffled = set(reversed(ids))
+    assert format_ids(set(ids[:ERROR_ID_LIMIT])) == str(ids[:ERROR_ID_LIMIT])  # exactly at the limit: no suffix
+    assert format_ids(shuffled) == f"{ids[:ERROR_ID_LIMIT]} (+1 more)"  # smallest IDs, in sorted order
+    assert format_ids(set(ids) | {"a", "b"}) == f"{['a', 'b'] + ids[:ERROR_ID_LIMIT - 2]} (+3 more)"
+    assert format_ids(set()) == "[]"
@@ -0,0 +1,60 @@
+"""Scalar geometry cores for render_svg, compiled with Numba when it is installed.
+
+Only float arithmetic lives here; render_svg keeps the SVG string formatting, so
+each symbol crosses the JIT boundary once. Without Numba the same functions run
+as plain Python. cache=True keeps the compiled code on disk between CLI runs.
+"""
+import math
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional
+    njit = None
+
+HAVE_NUMBA = njit is not None
+
+def _jit(fn):
+    # no fastmath: the renderer is deterministic and reassociation would move coordinates
+    return njit(cache=True)(fn) if HAVE_NUMBA else fn
+
+if HAVE_NUMBA:
+    @_jit
+    def unit_vec(dx, dy):
+        # explicit mul-add-sqrt inlines into the jitted callers; the select
+        # compiles to a conditional move rather than a branch
+        n = math.sqrt(dx*dx + dy*dy)
+        n = n if n != 0.0 else 1.0
+        return dx/n, dy/n
+else:
+    def unit_vec(dx, dy):
+        # math.hypot in plain Python: no intermediate overflow/underflow
+        n = math.hypot(dx, dy)
+        if n == 0.0:
+            n = 1.0
+        return dx/n, dy/n
+
+@_jit
+def line_intersection(x1, y1, x2, y2, x3, y3, x4, y4):
+    # (px, py, ok) for lines (x1,y1)-(x2,y2) and (x3,y3)-(x4,y4); ok is False when parallel
+    den = (x1-x2)*(y3-y4) - (y1-y2)*(x3-x4)
+    if abs(den) < 1e-9:
+        return 0.0, 0.0, False
+    px = ((x1*y2 - y1*x2)*(x3-x4) - (x1-x2)*(x3*y4 - y3*x4)) / den
+    py = ((x1*y2 - y1*x2)*(y3-y4) - (y1-y2)*(x3*y4 - y3*x4)) / den
+    return px, py, True
+
+@_jit
+def angle_arc_endpoints(vx, vy, x1a, y1a, x1b, y1b, x2a, y2a, x2b, y2b, r):
+    # arc from line 1 to line 2 around vertex (vx,vy); each line is measured from
+    # whichever endpoint is not the vertex. Returns (sx, sy, ex, ey, sweep_flag).
+    if x1a != vx or y1a != vy:
+        v1x, v1y = unit_vec(x1a - vx, y1a - vy)
+    else:
+        v1x, v1y = unit_vec(x1b - vx, y1b - vy)
+    if x2a != vx or y2a != vy:
+        v2x, v2y = unit_vec(x2a - vx, y2a - vy)
+    else:
+        v2x, v2y = unit_vec(x2b - vx, y2b - vy)
+    cross = v1x*v2y - v1y*v2x
+    swf = 1 if cross > 0 else 0
+    return vx + v1x*r, vy + v1y*r, vx + v2x*r, vy + v2y*r, swf
@@ -29,15 +29,22 @@ Run with::
         --config configs/raster_variants.sample.yaml \
         --items-root out_rommath_origin/items
 
+Pass ``--jobs N`` to render independent variants on N threads (``--processes``
+for worker processes).
+
 Operations supported:
     * ``erase_rect``  – fill an axis-aligned rectangle.
     * ``draw_line``   – draw a straight line between two points.
     * ``draw_circle`` – draw a circle/ellipse outline (optionally covering the whole figure).
     * ``add_text``    – overlay text (uses default PIL font unless ``font_path`` provided).
     * ``copy_paste``  – copy a rectangular patch elsewhere.
-    * ``blur_rect``   – blur a rectangular patch with Gaussian blur.
+    * ``blur_rect``   – blur a rectangular patch with Gaussian blur (PIL's;
+      ``--cv2-blur`` opts into OpenCV's, whose pixels differ slightly).
     * ``rotate``      – rotate the entire image by a given angle.
 
+PNG outputs are written with a fast zlib level (``--compress-level``); an
+``output_image`` ending in ``.webp`` is saved as lossless WebP instead.
+
 The script will refuse to overwrite existing images/variants unless
 ``--overwrite`` is passed.
 """
@@ -45,13 +52,28 @@ The script will refuse to overwrite existing images/variants unless
 from __future__ import annotations
 
 import argparse
+import functools
 import json
+import math
+import operator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Tuple
 
+import numpy as np
 import yaml
 from PIL import Image, ImageDraw, ImageFilter, ImageFont
 
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is used otherwise
+    orjson = None
+
+try:
+    import cv2
+except ImportError:  # optional; PIL's decoder is used otherwise (and --cv2-blur is unavailable)
+    cv2 = None
+
 Operation = Dict[str, Any]
 
 
@@ -96,15 +118,51 @@ def resolve_base_image(item_dir: Path, suggested: str | None) -> Path:
     raise FileNotFoundError(f"Could not infer base image for {item_dir}")
 
 
+def _decode_rgba(path: str) -> np.ndarray:
+    if cv2 is not None and path.lower().endswith(".png"):
+        raw = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        # 16-bit PNGs go through PIL so conversion matches the PIL path.
+        if raw is not None and raw.dtype == np.uint8:
+            if raw.ndim == 2:
+                return cv2.cvtColor(raw, cv2.COLOR_GRAY2RGBA)
+            if raw.shape[2] == 3:
+                return cv2.cvtColor(raw, cv2.COLOR_BGR2RGBA)
+            if raw.shape[2] == 4:
+                return cv2.cvtColor(raw, cv2.COLOR_BGRA2RGBA)
+    with Image.open(path) as im:
+        im.load()
+        return np.array(im if im.mode == "RGBA" else im.convert("RGBA"))
+
+
+@functools.lru_cache(maxsize=8)
+def _load_base(path: str, mtime_ns: int, size: int) -> np.ndarray:
+    # mtime/size are part of the key so an edited file is decoded again.
+    arr = _decode_rgba(path)
+    arr.setflags(write=False)  # shared between variants; callers take a copy
+    return arr
+
+
 def color_tuple(values: Iterable[int] | None, default: Tuple[int, int, int, int] = (255, 255, 255, 255)) -> Tuple[int, int, int, int]:
     if values is None:
         return default
-    vals = list(values)
+    return _color_tuple(tuple(values))
+
+
+@functools.lru_cache(maxsize=256)
+def _color_tuple(vals: Tuple[int, ...]) -> Tuple[int, int, int, int]:
     if len(vals) not in (3, 4):
         raise ValueError("color must have 3 (RGB) or 4 (RGBA) integers")
-    if len(vals) == 3:
-        vals.append(255)
-    return tuple(int(v) for v in vals)
+    return tuple(map(int, vals + (255,) * (4 - len(vals))))
+
+
+@functools.lru_cache(maxsize=32)
+def _get_font(path: str | None, size: int) -> ImageFont.ImageFont | ImageFont.FreeTypeFont:
+    if path:
+        return ImageFont.truetype(str(Path(path)), size)
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except IOError:
+        return ImageFont.load_default()
 
 
 def _resolve_resample(name: str | None) -> int:
@@ -114,31 +172,242 @@ def _resolve_resample(name: str | None) -> int:
     return getattr(Image, key, Image.BICUBIC)
 
 
-def apply_operation(image: Image.Image, op: Operation) -> Image.Image:
+class RasterCanvas:
+    """RGBA pixel buffer threaded through the operations of one variant.
+
+    Fills, copies and blurs work on ``arr`` (an ``(H, W, 4)`` uint8 array) in
+    place.  Drawing ops share a single ``ImageDraw`` instance; the buffer only
+    changes representation when the next op needs the other one.  Rotations are
+    queued and resampled together when the next op reads the pixels.
+    """
+
+    def __init__(self, arr: np.ndarray, cv2_blur: bool = False) -> None:
+        self.cv2_blur = cv2_blur
+        self._arr: np.ndarray | None = arr
+        self._img: Image.Image | None = None
+        self._draw: ImageDraw.ImageDraw | None = None
+        self._pending: List[Operation] = []
+        self._pending_key: Tuple[Any, ...] | None = None
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        self._flush()
+        if self._arr is not None:
+            return self._arr.shape[1], self._arr.shape[0]
+        return self._img.size
+
+    @property
+    def arr(self) -> np.ndarray:
+        self._flush()
+        if self._arr is None:
+            self._arr = np.array(self._img)
+            self._img = self._draw = None
+        return self._arr
+
+    @property
+    def draw(self) -> ImageDraw.ImageDraw:
+        self._flush()  # drops the stale ImageDraw when queued rotations are applied
+        if self._draw is None:
+            self._draw = ImageDraw.Draw(self.image(), "RGBA")
+        return self._draw
+
+    def image(self) -> Image.Image:
+        self._flush()
+        return self._as_image()
+
+    def queue_rotate(self, op: Operation) -> None:
+        # Only rotations sharing fill and filter can share one resample.
+        key = (_rotate_fill(op), _resolve_resample(op.get("resample")))
+        if self._pending and key != self._pending_key:
+            self._flush()
+        self._pending.append(op)
+        self._pending_key = key
+
+    def _as_image(self) -> Image.Image:
+        if self._img is None:
+            self._img = Image.fromarray(self._arr, "RGBA")
+            self._arr = None
+        return self._img
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        ops, self._pending = self._pending, []
+        fill, resample = self._pending_key
+        result = _apply_rotations(self._as_image(), ops, fill, resample)
+        self._img, self._arr, self._draw = result, None, None
+
+
+# The helpers below reproduce PIL's rectangle/crop/paste semantics on arrays:
+# rectangles are inclusive of x2/y2, crops round their box and zero-pad outside
+# the image, pastes clip to the destination.
+
+def _fill_rect(arr: np.ndarray, bbox, color: Tuple[int, int, int, int]) -> None:
+    # Checked on the raw coordinates, before truncation, as ImageDraw.rectangle does.
+    if bbox[2] < bbox[0]:
+        raise ValueError("x1 must be greater than or equal to x0")
+    if bbox[3] < bbox[1]:
+        raise ValueError("y1 must be greater than or equal to y0")
+    x0, y0, x1, y1 = (int(v) for v in bbox)
+    h, w = arr.shape[:2]
+    xs, xe = max(x0, 0), min(x1, w - 1) + 1
+    ys, ye = max(y0, 0), min(y1, h - 1) + 1
+    if xs < xe and ys < ye:
+        if arr.flags.c_contiguous:
+            # One 32-bit store per pixel; viewing the RGBA bytes as uint32 keeps native byte order.
+            arr.view(np.uint32)[ys:ye, xs:xe].fill(np.array(color, dtype=np.uint8).view(np.uint32)[0])
+        else:
+            arr[ys:ye, xs:xe] = color
+
+
+def _crop(arr: np.ndarray, bbox) -> Tuple[np.ndarray, int, int]:
+    # Checked on the raw coordinates, before rounding, as Image.crop does.
+    if bbox[2] < bbox[0]:
+        raise ValueError("Coordinate 'right' is less than 'left'")
+    if bbox[3] < bbox[1]:
+        raise ValueError("Coordinate 'lower' is less than 'upper'")
+    x0, y0, x1, y1 = (int(round(v)) for v in bbox)
+    h, w = arr.shape[:2]
+    patch = np.zeros((max(y1 - y0, 0), max(x1 - x0, 0), arr.shape[2]), dtype=arr.dtype)
+    xs, xe = max(x0, 0), min(x1, w)
+    ys, ye = max(y0, 0), min(y1, h)
+    if xs < xe and ys < ye:
+        patch[ys - y0:ye - y0, xs - x0:xe - x0] = arr[ys:ye, xs:xe]
+    return patch, x0, y0
+
+
+def _paste(arr: np.ndarray, patch: np.ndarray, dx: int, dy: int) -> None:
+    h, w = arr.shape[:2]
+    ph, pw = patch.shape[:2]
+    xs, xe = max(dx, 0), min(dx + pw, w)
+    ys, ye = max(dy, 0), min(dy + ph, h)
+    if xs < xe and ys < ye:
+        arr[ys:ye, xs:xe] = patch[ys - dy:ye - dy, xs - dx:xe - dx]
+
+
+def _rotate_fill(op: Operation) -> Tuple[int, int, int, int]:
+    return color_tuple(op.get("fill"), default=(255, 255, 255, 0))
+
+
+def _rotate(image: Image.Image, op: Operation) -> Image.Image:
+    angle = float(op.get("angle", 0.0))
+    expand = bool(op.get("expand", True))
+    fill = _rotate_fill(op)
+    resample = _resolve_resample(op.get("resample"))
+    if op.get("keep_size") and expand and angle % 90.0:
+        # Resample only the window that survives the centre crop/letterbox.
+        matrix, size = _rotation_matrix(image.size, op)
+        return image.transform(size, Image.AFFINE, tuple(matrix[:2].ravel()), resample, fillcolor=fill)
+    rotated = image.rotate(angle, expand=expand, resample=resample, fillcolor=fill)
+    if op.get("keep_size") and rotated.size != image.size:
+        target_w, target_h = image.size
+        rw, rh = rotated.size
+        if rw >= target_w and rh >= target_h:
+            left = max(0, (rw - target_w) // 2)
+            top = max(0, (rh - target_h) // 2)
+            rotated = rotated.crop((left, top, left + target_w, top + target_h))
+        else:
+            canvas_img = Image.new(image.mode, (target_w, target_h), fill)
+            left = max(0, (target_w - rw) // 2)
+            top = max(0, (target_h - rh) // 2)
+            canvas_img.paste(rotated, (left, top))
+            rotated = canvas_img
+    return rotated
+
+
+def _apply_rotations(image: Image.Image, ops: List[Operation], fill, resample) -> Image.Image:
+    """Apply ``rotate`` ops in order, folding runs that one affine resample reproduces.
+
+    Only ``expand=True`` steps keep the whole image, so a folded run ends at the
+    first step that clips (``expand=False`` or ``keep_size``).  Right angles are
+    never folded: Image.rotate transposes those exactly, while a transform would
+    premultiply translucent pixels.
+    """
+    run: List[Operation] = []
+    for op in ops:
+        if float(op.get("angle", 0.0)) % 90.0 == 0.0:
+            image = _rotate_run(image, run, fill, resample)
+            image, run = _rotate(image, op), []
+            continue
+        run.append(op)
+        if op.get("keep_size") or not op.get("expand", True):
+            image, run = _rotate_run(image, run, fill, resample), []
+    return _rotate_run(image, run, fill, resample)
+
+
+def _rotate_run(image: Image.Image, ops: List[Operation], fill, resample) -> Image.Image:
+    if len(ops) < 2:
+        return _rotate(image, ops[0]) if ops else image
+    matrix, size = np.eye(3), image.size
+    for op in ops:
+        step, size = _rotation_matrix(size, op)
+        matrix = matrix @ step
+    return image.transform(size, Image.AFFINE, tuple(matrix[:2].ravel()), resample, fillcolor=fill)
+
+
+def _rotation_matrix(size: Tuple[int, int], op: Operation) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """Output-to-input affine of one ``rotate`` op (as ``_rotate`` applies it) and its output size."""
+    w, h = size
+    angle = float(op.get("angle", 0.0)) % 360.0
+    theta = -math.radians(angle)
+    # Same rounding as Image.rotate so folded warps line up with it.
+    c, s = round(math.cos(theta), 15), round(math.sin(theta), 15)
+    rot = np.array([[c, s], [-s, c]])
+    expand = op.get("expand", True)
+    if angle in (0.0, 180.0) or not expand:
+        nw, nh = w, h
+    elif angle in (90.0, 270.0):
+        nw, nh = h, w  # Image.rotate transposes exactly here
+    else:
+        corners = rot @ np.array([[0, w, w, 0], [0, 0, h, h]], dtype=float)
+        corners += (rot @ (-w / 2.0, -h / 2.0) + (w / 2.0, h / 2.0))[:, None]
+        nw = math.ceil(corners[0].max()) - math.floor(corners[0].min())
+        nh = math.ceil(corners[1].max()) - math.floor(corners[1].min())
+    m = np.eye(3)
+    m[:2, :2] = rot
+    m[:2, 2] = (w / 2.0, h / 2.0) - rot @ (nw / 2.0, nh / 2.0)  # output centre -> input centre
+    if op.get("keep_size") and (nw, nh) != (w, h):
+        # Centre crop or letterbox back to the input size is a pure shift.
+        if nw >= w and nh >= h:
+            shift = (max(0, (nw - w) // 2), max(0, (nh - h) // 2))
+        else:
+            shift = (-max(0, (w - nw) // 2), -max(0, (h - nh) // 2))
+        m = m @ np.array([[1.0, 0.0, shift[0]], [0.0, 1.0, shift[1]], [0.0, 0.0, 1.0]])
+        nw, nh = w, h
+    return m, (nw, nh)
+
+
+def _gaussian_blur(patch: np.ndarray, radius: float, use_cv2: bool = False) -> np.ndarray:
+    # PIL approximates the Gaussian with box passes, cv2 convolves a true kernel:
+    # the pixels differ, so cv2 only runs when asked for. PIL's radius is the
+    # standard deviation, so it maps straight onto sigma.
+    if use_cv2 and patch.size and radius > 0:
+        return cv2.GaussianBlur(patch, (0, 0), sigmaX=radius, sigmaY=radius, borderType=cv2.BORDER_REPLICATE)
+    return np.asarray(Image.fromarray(patch, "RGBA").filter(ImageFilter.GaussianBlur(radius=radius)))
+
+
+def apply_operation(canvas: RasterCanvas, op: Operation) -> None:
     op_type = op.get("type")
     if not op_type:
         raise ValueError(f"Operation missing 'type': {op}")
-    draw = ImageDraw.Draw(image, "RGBA")
 
     if op_type == "erase_rect":
         bbox = op.get("bbox")
         if not (isinstance(bbox, (list, tuple)) and len(bbox) == 4):
             raise ValueError("erase_rect requires bbox=[x1,y1,x2,y2]")
-        draw.rectangle(bbox, fill=color_tuple(op.get("color")))
-        return image
+        _fill_rect(canvas.arr, bbox, color_tuple(op.get("color")))
 
     elif op_type == "draw_line":
         points = op.get("points")
         if not (isinstance(points, (list, tuple)) and len(points) >= 4):
             raise ValueError("draw_line requires points=[x1,y1,x2,y2,...]")
         width = int(op.get("width", 3))
-        draw.line(points, fill=color_tuple(op.get("color"), default=(0, 0, 0, 255)), width=width)
-        return image
+        canvas.draw.line(points, fill=color_tuple(op.get("color"), default=(0, 0, 0, 255)), width=width)
 
     elif op_type == "draw_circle":
         fit = op.get("fit")
         if fit == "cover":
-            w, h = image.size
+            w, h = canvas.size
             cx, cy = w / 2.0, h / 2.0
             margin = float(op.get("margin", 0.0))
             radius = max(w, h) / 2.0 + margin
@@ -154,25 +423,15 @@ def apply_operation(image: Image.Image, op: Operation) -> Image.Image:
         fill_color = color_tuple(fill_raw) if fill_raw is not None else None
         width = int(op.get("width", 6))
         bbox = (cx - radius, cy - radius, cx + radius, cy + radius)
-        draw.ellipse(bbox, outline=outline_color, width=width, fill=fill_color)
-        return image
+        canvas.draw.ellipse(bbox, outline=outline_color, width=width, fill=fill_color)
 
     elif op_type == "add_text":
         text = op.get("text", "")
         position = op.get("position")
         if not (isinstance(position, (list, tuple)) and len(position) == 2):
             raise ValueError("add_text requires position=[x,y]")
-        font_size = int(op.get("font_size", 16))
-        font_path = op.get("font_path")
-        if font_path:
-            font = ImageFont.truetype(str(Path(font_path)), font_size)
-        else:
-            try:
-                font = ImageFont.truetype("arial.ttf", font_size)
-            except IOError:
-                font = ImageFont.load_default()
-        draw.text(position, text, fill=color_tuple(op.get("fill"), default=(0, 0, 0, 255)), font=font)
-        return image
+        font = _get_font(op.get("font_path"), int(op.get("font_size", 16)))
+        canvas.draw.text(position, text, fill=color_tuple(op.get("fill"), default=(0, 0, 0, 255)), font=font)
 
     elif op_type == "copy_paste":
         src_bbox = op.get("src_bbox")
@@ -181,50 +440,46 @@ def apply_operation(image: Image.Image, op: Operation) -> Image.Image:
             raise ValueError("copy_paste requires src_bbox=[x1,y1,x2,y2]")
         if not (isinstance(dst_xy, (list, tuple)) and len(dst_xy) == 2):
             raise ValueError("copy_paste requires dst_xy=[x,y]")
-        patch = image.crop(tuple(src_bbox))
-        image.paste(patch, tuple(int(v) for v in dst_xy))
+        arr = canvas.arr
+        patch, _, _ = _crop(arr, src_bbox)
+        _paste(arr, patch, int(dst_xy[0]), int(dst_xy[1]))
         if op.get("clear_src"):
-            draw.rectangle(src_bbox, fill=color_tuple(op.get("clear_color")))
-        return image
+            _fill_rect(arr, src_bbox, color_tuple(op.get("clear_color")))
 
     elif op_type == "blur_rect":
         bbox = op.get("bbox")
         if not (isinstance(bbox, (list, tuple)) and len(bbox) == 4):
             raise ValueError("blur_rect requires bbox=[x1,y1,x2,y2]")
         radius = float(op.get("radius", 3.0))
-        rect = image.crop(tuple(bbox))
-        rect = rect.filter(ImageFilter.GaussianBlur(radius=radius))
-        image.paste(rect, tuple(bbox[:2]))
-        return image
+        arr = canvas.arr
+        patch, _, _ = _crop(arr, bbox)
+        # The blurred patch goes back at bbox[:2] itself; like Image.paste, this
+        # rejects fractional corners instead of rounding them.
+        _paste(arr, _gaussian_blur(patch, radius, canvas.cv2_blur), operator.index(bbox[0]), operator.index(bbox[1]))
 
     elif op_type == "rotate":
-        angle = float(op.get("angle", 0.0))
-        expand = bool(op.get("expand", True))
-        fill = color_tuple(op.get("fill"), default=(255, 255, 255, 0))
-        resample = _resolve_resample(op.get("resample"))
-        rotated = image.rotate(angle, expand=expand, resample=resample, fillcolor=fill)
-        if op.get("keep_size") and rotated.size != image.size:
-            target_w, target_h = image.size
-            rw, rh = rotated.size
-            if rw >= target_w and rh >= target_h:
-                left = max(0, (rw - target_w) // 2)
-                top = max(0, (rh - target_h) // 2)
-                cropped = rotated.crop((left, top, left + target_w, top + target_h))
-                return cropped
-            canvas = Image.new(image.mode, (target_w, target_h), fill)
-            left = max(0, (target_w - rw) // 2)
-            top = max(0, (target_h - rh) // 2)
-            canvas.paste(rotated, (left, top))
-            return canvas
-        return rotated
+        canvas.queue_rotate(op)
 
     else:
         raise ValueError(f"Unsupported operation type '{op_type}'")
 
-    return image
+
+def save_image(image: Image.Image, path: Path, compress_level: int = 1) -> None:
+    # Outputs are lossless either way; fast settings trade a little file size for encode time.
+    if path.suffix.lower() == ".webp":
+        image.save(path, format="WEBP", lossless=True, quality=0, method=0)
+    else:
+        image.save(path, format="PNG", compress_level=compress_level, optimize=False)
 
 
-def process_item(item_cfg: Dict[str, Any], items_root: Path, overwrite: bool, dry_run: bool = False) -> None:
+def render_variant(
+    item_cfg: Dict[str, Any],
+    items_root: Path,
+    overwrite: bool,
+    dry_run: bool = False,
+    compress_level: int = 1,
+    cv2_blur: bool = False,
+) -> None:
     item_id = item_cfg.get("id")
     if not item_id:
         raise ValueError("Each config entry must include an 'id'")
@@ -249,32 +504,79 @@ def process_item(item_cfg: Dict[str, Any], items_root: Path, overwrite: bool, dr
     if dry_run:
         return
 
-    image = Image.open(base_image_path).convert("RGBA")
+    stat = base_image_path.stat()
+    base = _load_base(str(base_image_path), stat.st_mtime_ns, stat.st_size).copy()
+    canvas = RasterCanvas(base, cv2_blur)
     for op in operations:
-        image = apply_operation(image, op)
+        apply_operation(canvas, op)
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    image.save(output_path)
+    save_image(canvas.image(), output_path, compress_level)
 
-    variant_entry = item_cfg.get("variant")
-    if not isinstance(variant_entry, dict):
-        raise ValueError(f"Entry {item_id} must provide a 'variant' mapping")
 
-    variants_path = item_dir / "variants.json"
-    variants = json.loads(variants_path.read_text(encoding="utf-8"))
-    ensure_variant_entry(variants, variant_entry, overwrite)
-    variants_path.write_text(json.dumps(variants, indent=2) + "\n", encoding="utf-8")
+def _read_json(path: Path) -> Any:
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    return json.loads(path.read_text(encoding="utf-8"))
+
 
-    if "diagnostic_note" in item_cfg:
-        diag_path = item_dir / "diagnostic.json"
-        try:
-            diagnostic = json.loads(diag_path.read_text(encoding="utf-8"))
-        except FileNotFoundError:
-            diagnostic = {}
-        notes = diagnostic.setdefault("notes", [])
-        if item_cfg["diagnostic_note"] not in notes:
-            notes.append(item_cfg["diagnostic_note"])
-        diag_path.write_text(json.dumps(diagnostic, indent=2) + "\n", encoding="utf-8")
+def record_variants(item_cfgs: List[Dict[str, Any]], items_root: Path, overwrite: bool) -> None:
+    """Update ``variants.json``/``diagnostic.json`` with one read and write per item."""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for item_cfg in item_cfgs:
+        groups.setdefault(item_cfg["id"], []).append(item_cfg)
+
+    for item_id, group in groups.items():
+        item_dir = items_root / item_id
+        for item_cfg in group:
+            if not isinstance(item_cfg.get("variant"), dict):
+                raise ValueError(f"Entry {item_id} must provide a 'variant' mapping")
+
+        variants_path = item_dir / "variants.json"
+        variants = _read_json(variants_path)
+        for item_cfg in group:
+            ensure_variant_entry(variants, item_cfg["variant"], overwrite)
+        variants_path.write_text(json.dumps(variants, indent=2) + "\n", encoding="utf-8")
+
+        new_notes = [item_cfg["diagnostic_note"] for item_cfg in group if "diagnostic_note" in item_cfg]
+        if new_notes:
+            diag_path = item_dir / "diagnostic.json"
+            try:
+                diagnostic = _read_json(diag_path)
+            except FileNotFoundError:
+                diagnostic = {}
+            notes = diagnostic.setdefault("notes", [])
+            for note in new_notes:
+                if note not in notes:
+                    notes.append(note)
+            diag_path.write_text(json.dumps(diagnostic, indent=2) + "\n", encoding="utf-8")
+
+
+def process_item(
+    item_cfg: Dict[str, Any],
+    items_root: Path,
+    overwrite: bool,
+    dry_run: bool = False,
+    compress_level: int = 1,
+    cv2_blur: bool = False,
+) -> None:
+    render_variant(item_cfg, items_root, overwrite, dry_run, compress_level, cv2_blur)
+    if not dry_run:
+        record_variants([item_cfg], items_root, overwrite)
+
+
+def _renders_independent(entries: List[Dict[str, Any]], items_root: Path) -> bool:
+    """True when no entry reads (or also writes) an image another entry writes."""
+    outputs = set()
+    for entry in entries:
+        out = items_root / str(entry.get("id")) / str(entry.get("output_image"))
+        if out in outputs:
+            return False
+        outputs.add(out)
+    return not any(
+        entry.get("base_image") and items_root / str(entry.get("id")) / entry["base_image"] in outputs
+        for entry in entries
+    )
 
 
 def main() -> None:
@@ -283,14 +585,51 @@ def main() -> None:
     parser.add_argument("--items-root", default="out_rommath_origin/items", help="Root directory containing item folders")
     parser.add_argument("--overwrite", action="store_true", help="Allow replacing existing images/variants")
     parser.add_argument("--dry-run", action="store_true", help="Print actions without writing files")
+    parser.add_argument("--jobs", type=int, default=1, help="Render variants on N threads (PIL releases the GIL while resampling and encoding)")
+    parser.add_argument("--processes", action="store_true", help="Use worker processes instead of threads for --jobs")
+    parser.add_argument("--compress-level", type=int, default=1, help="zlib level for PNG outputs (0-9; PIL's default is 6)")
+    parser.add_argument("--cv2-blur", action="store_true", help="Use OpenCV's Gaussian for blur_rect (faster; pixels differ from the PIL default)")
     args = parser.parse_args()
+    if args.cv2_blur and cv2 is None:
+        parser.error("--cv2-blur requires opencv-python")
 
     config_path = Path(args.config)
     items_root = Path(args.items_root)
     data = load_config(config_path)
 
-    for entry in data.get("items", []):
-        process_item(entry, items_root, overwrite=args.overwrite, dry_run=args.dry_run)
+    entries = list(data.get("items", []))
+    render = functools.partial(
+        render_variant,
+        items_root=items_root,
+        overwrite=args.overwrite,
+        dry_run=args.dry_run,
+        compress_level=args.compress_level,
+        cv2_blur=args.cv2_blur,
+    )
+    if args.jobs > 1 and not args.dry_run and _renders_independent(entries, items_root):
+        executor = ProcessPoolExecutor if args.processes else ThreadPoolExecutor
+        with executor(max_workers=args.jobs) as ex:
+            futures = [ex.submit(render, entry) for entry in entries]
+        errors = [future.exception() for future in futures]
+    else:
+        # In config order, since an entry may edit an image an earlier one wrote;
+        # stops at the first failure.
+        errors = []
+        for entry in entries:
+            try:
+                render(entry)
+            except Exception as error:
+                errors.append(error)
+                break
+            errors.append(None)
+
+    # Bookkeeping runs after the pixel work, in config order, once per item; every
+    # image that was written gets its entry even when another render failed.
+    if not args.dry_run:
+        record_variants([entry for entry, error in zip(entries, errors) if error is None], items_root, overwrite=args.overwrite)
+    first_error = next((error for error in errors if error is not None), None)
+    if first_error is not None:
+        raise first_error
 
     print("[raster-variants] Done.")
 
@@ -33,55 +33,136 @@ Example usage::
         --scene items/T1/scene.yaml \
         --variants items/T1/T1.variants.json \
         --out_dir items/T1
+
+Variants are rendered in parallel worker processes, or in-process when there
+are only a few to render; pass ``--workers 1`` to always run them one after
+another in-process.
 """
 
 from __future__ import annotations
 
 import argparse
-import copy
+import functools
 import json
+import pickle
 import re
+import shutil
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List
 
 import yaml
 
+try:
+    from yaml import CSafeDumper as _Dumper, CSafeLoader as _Loader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper as _Dumper, SafeLoader as _Loader
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from tools import render_svg  # noqa: E402
+
+# Below this many edited variants the default run skips the process pool: startup costs more.
+POOL_MIN_ITEMS = 4
+
 
 def load_json(path: str | Path):
     return json.load(open(Path(path), "r", encoding="utf-8"))
 
 
 def load_yaml(path: str | Path):
-    return yaml.safe_load(open(Path(path), "r", encoding="utf-8"))
+    with open(Path(path), "rb") as f:
+        return yaml.load(f, Loader=_Loader)
 
 
 def save_yaml(obj, path: str | Path) -> None:
-    yaml.safe_dump(obj, open(Path(path), "w", encoding="utf-8"), sort_keys=False, allow_unicode=True)
-
-
-def remove_symbol_or_text(scene: Dict, sid: str) -> Dict:
-    scene["symbols"] = [s for s in scene.get("symbols", []) if s.get("id") != sid]
-    scene["texts"] = [t for t in scene.get("texts", []) if t.get("id") != sid]
-    scene["relations"] = [
-        r
-        for r in scene.get("relations", [])
-        if not (
-            (r.get("type") == "sym2geo" and r.get("symbol_id") == sid)
-            or (r.get("type") == "text2geo" and r.get("text_id") == sid)
-        )
-    ]
+    with open(Path(path), "w", encoding="utf-8") as f:
+        yaml.dump(obj, f, Dumper=_Dumper, sort_keys=False, allow_unicode=True)
+
+
+class SceneIndex:
+    """Scene wrapper with ``id -> positions`` lookups for the edit ops.
+
+    Removals leave ``None`` tombstones so the stored positions stay valid;
+    ``compact`` drops them and returns the plain scene dict for saving.
+    """
+
+    def __init__(self, scene: Dict) -> None:
+        self.scene = scene
+        self._build()
+
+    def _build(self) -> None:
+        scene = self.scene
+        self.sym_idx: Dict[str, List[int]] = {}
+        self.text_idx: Dict[str, List[int]] = {}
+        self.rel_by_symbol: Dict[str, List[int]] = {}
+        self.rel_by_text: Dict[str, List[int]] = {}
+        for i, s in enumerate(scene.get("symbols", [])):
+            self.sym_idx.setdefault(s.get("id"), []).append(i)
+        for i, t in enumerate(scene.get("texts", [])):
+            self.text_idx.setdefault(t.get("id"), []).append(i)
+        for i, r in enumerate(scene.get("relations", [])):
+            self._index_relation(i, r)
+
+    def _index_relation(self, i: int, r: Dict) -> None:
+        if r.get("type") == "sym2geo":
+            self.rel_by_symbol.setdefault(r.get("symbol_id"), []).append(i)
+        elif r.get("type") == "text2geo":
+            self.rel_by_text.setdefault(r.get("text_id"), []).append(i)
+
+    def _drop(self, key: str, index: Dict[str, List[int]], item_id: str) -> None:
+        items = self.scene[key]
+        for i in index.pop(item_id, ()):
+            items[i] = None
+
+    def has_symbol(self, sid: str) -> bool:
+        return sid in self.sym_idx
+
+    def texts(self, tid: str) -> List[Dict]:
+        items = self.scene.get("texts", [])
+        return [items[i] for i in self.text_idx.get(tid, ())]
+
+    def add_symbol(self, symbol: Dict, relation: Dict) -> None:
+        symbols = self.scene.setdefault("symbols", [])
+        self.sym_idx.setdefault(symbol.get("id"), []).append(len(symbols))
+        symbols.append(symbol)
+        relations = self.scene.setdefault("relations", [])
+        self._index_relation(len(relations), relation)
+        relations.append(relation)
+
+    def remove_symbol(self, sid: str) -> None:
+        for key in ("symbols", "relations"):
+            self.scene.setdefault(key, [])
+        self._drop("symbols", self.sym_idx, sid)
+        self._drop("relations", self.rel_by_symbol, sid)
+
+    def remove_symbol_or_text(self, sid: str) -> None:
+        # Removals always leave all three lists in the scene, even when empty.
+        for key in ("symbols", "texts", "relations"):
+            self.scene.setdefault(key, [])
+        self.remove_symbol(sid)
+        self._drop("texts", self.text_idx, sid)
+        self._drop("relations", self.rel_by_text, sid)
+
+    def compact(self) -> Dict:
+        for key in ("symbols", "texts", "relations"):
+            if key in self.scene:
+                self.scene[key] = [x for x in self.scene[key] if x is not None]
+        self._build()
+        return self.scene
+
+
+def remove_symbol_or_text(scene: SceneIndex, sid: str) -> SceneIndex:
+    scene.remove_symbol_or_text(sid)
     return scene
 
 
-def remove_symbol(scene: Dict, sid: str) -> Dict:
-    scene["symbols"] = [s for s in scene.get("symbols", []) if s.get("id") != sid]
-    scene["relations"] = [
-        r
-        for r in scene.get("relations", [])
-        if not (r.get("type") == "sym2geo" and r.get("symbol_id") == sid)
-    ]
+def remove_symbol(scene: SceneIndex, sid: str) -> SceneIndex:
+    scene.remove_symbol(sid)
     return scene
 
 
@@ -97,22 +178,21 @@ def _canonical_symbol_id(sym_type: str, targets: List[str]) -> str:
     return f"{prefix}_{key}"
 
 
-def toggle_symbol(scene: Dict, sym_type: str, line_ids: List[str], action: str) -> Dict:
+def toggle_symbol(scene: SceneIndex, sym_type: str, line_ids: List[str], action: str) -> SceneIndex:
     if len(line_ids) < 2:
         raise ValueError(f"toggle_{sym_type} requires at least two line IDs")
 
     sym_id = _canonical_symbol_id(sym_type, line_ids)
 
     if action == "add":
-        if not any(s.get("id") == sym_id for s in scene.get("symbols", [])):
+        if not scene.has_symbol(sym_id):
             symbol = {"id": sym_id, "type": sym_type, "targets": line_ids}
-            scene.setdefault("symbols", []).append(symbol)
             relation = {
                 "type": "sym2geo",
                 "symbol_id": sym_id,
                 "target_ids": line_ids,
             }
-            scene.setdefault("relations", []).append(relation)
+            scene.add_symbol(symbol, relation)
     elif action == "remove":
         scene = remove_symbol(scene, sym_id)
     else:
@@ -121,68 +201,92 @@ def toggle_symbol(scene: Dict, sym_type: str, line_ids: List[str], action: str)
     return scene
 
 
-def nudge_label(scene: Dict, text_id: str, dx: float, dy: float) -> Dict:
-    for t in scene.get("texts", []):
-        if t.get("id") == text_id:
-            offset = t.get("offset", [0, 0])
-            if len(offset) < 2:
-                offset = [0, 0]
-            t["offset"] = [offset[0] + dx, offset[1] + dy]
+def nudge_label(scene: SceneIndex, text_id: str, dx: float, dy: float) -> SceneIndex:
+    for t in scene.texts(text_id):
+        offset = t.get("offset", [0, 0])
+        if len(offset) < 2:
+            offset = [0, 0]
+        t["offset"] = [offset[0] + dx, offset[1] + dy]
     return scene
 
 
-def swap_labels(scene: Dict, t1: str, t2: str) -> Dict:
-    texts = scene.get("texts", [])
-    a = next((x for x in texts if x.get("id") == t1), None)
-    b = next((x for x in texts if x.get("id") == t2), None)
+def swap_labels(scene: SceneIndex, t1: str, t2: str) -> SceneIndex:
+    a = next(iter(scene.texts(t1)), None)
+    b = next(iter(scene.texts(t2)), None)
     if a and b:
         a["string"], b["string"] = b["string"], a["string"]
     return scene
 
 
-def apply_ops(scene: Dict, ops: List[str]):
+_ROTATE_RE = re.compile(r"rotate(-?\d+)")
+
+
+def _op_rotate(scene: SceneIndex, params: Dict, op: str, arg: str) -> SceneIndex:
+    match = _ROTATE_RE.match(op)
+    if match:
+        params["rotate"] = float(match.group(1))
+    return scene
+
+
+def _op_thin_symbols(scene: SceneIndex, params: Dict, op: str, arg: str) -> SceneIndex:
+    params["symbol_opacity"] = 0.5
+    return scene
+
+
+def _op_remove_symbol(scene: SceneIndex, params: Dict, op: str, arg: str) -> SceneIndex:
+    return remove_symbol_or_text(scene, arg)
+
+
+def _op_nudge(scene: SceneIndex, params: Dict, op: str, arg: str) -> SceneIndex:
+    text_id, delta = arg.split(":")
+    dx, dy = delta.split(",")
+    return nudge_label(scene, text_id, float(dx), float(dy))
+
+
+def _op_swap(scene: SceneIndex, params: Dict, op: str, arg: str) -> SceneIndex:
+    t1, t2 = arg.split(",")
+    return swap_labels(scene, t1, t2)
+
+
+def _op_toggle(sym_type: str):
+    def handler(scene: SceneIndex, params: Dict, op: str, arg: str) -> SceneIndex:
+        line_part, action = arg.split(":")
+        lines = [token.strip() for token in line_part.split(",") if token.strip()]
+        return toggle_symbol(scene, sym_type, lines, action)
+    return handler
+
+
+# Keyed on the text up to and including the first ":"; ops that take an
+# argument only match with it, bare ops only without.  ``rotate<deg>`` is
+# matched by prefix.
+DISPATCH = {
+    "rotate": _op_rotate,
+    "thin_symbols": _op_thin_symbols,
+    "remove_symbol:": _op_remove_symbol,
+    "nudge:": _op_nudge,
+    "swap:": _op_swap,
+    "toggle_parallel:": _op_toggle("parallel"),
+    "toggle_perpendicular:": _op_toggle("perpendicular"),
+}
+
+
+def apply_ops(scene: SceneIndex, ops: List[str]):
     params = {"rotate": 0.0, "symbol_opacity": 1.0}
     if not ops:
         return scene, params
 
     for op in ops:
-        if op.startswith("rotate"):
-            match = re.match(r"rotate(-?\d+)", op)
-            if match:
-                params["rotate"] = float(match.group(1))
-        elif op == "thin_symbols":
-            params["symbol_opacity"] = 0.5
-        elif op.startswith("remove_symbol:"):
-            sid = op.split(":", 1)[1]
-            scene = remove_symbol_or_text(scene, sid)
-        elif op.startswith("nudge:"):
-            _, body = op.split(":", 1)
-            text_id, delta = body.split(":")
-            dx, dy = delta.split(",")
-            scene = nudge_label(scene, text_id, float(dx), float(dy))
-        elif op.startswith("swap:"):
-            _, pair = op.split(":", 1)
-            t1, t2 = pair.split(",")
-            scene = swap_labels(scene, t1, t2)
-        elif op.startswith("toggle_parallel:"):
-            _, body = op.split(":", 1)
-            line_part, action = body.split(":")
-            lines = [token.strip() for token in line_part.split(",") if token.strip()]
-            scene = toggle_symbol(scene, "parallel", lines, action)
-        elif op.startswith("toggle_perpendicular:"):
-            _, body = op.split(":", 1)
-            line_part, action = body.split(":")
-            lines = [token.strip() for token in line_part.split(",") if token.strip()]
-            scene = toggle_symbol(scene, "perpendicular", lines, action)
-        else:
+        head, sep, arg = op.partition(":")
+        handler = DISPATCH.get("rotate" if op.startswith("rotate") else head + sep)
+        if handler is None:
             raise ValueError(f"Unsupported render op: {op}")
+        scene = handler(scene, params, op, arg)
 
     return scene, params
 
 
-def call_renderer(scene_path: Path, out_dir: Path, rotate: float, symbol_opacity: float) -> None:
-    root = Path(__file__).resolve().parents[1]
-    render = root / "tools" / "render_svg.py"
+def call_renderer(scene_path: Path, out_dir: Path, rotate: float, symbol_opacity: float, output: Path | None = None) -> None:
+    render = ROOT / "tools" / "render_svg.py"
     cmd = [
         sys.executable,
         str(render),
@@ -195,7 +299,52 @@ def call_renderer(scene_path: Path, out_dir: Path, rotate: float, symbol_opacity
         "--symbol_opacity",
         str(symbol_opacity),
     ]
-    subprocess.check_call(cmd, cwd=str(root))
+    if output is not None:
+        cmd += ["--output", str(output)]
+    subprocess.check_call(cmd, cwd=str(ROOT))
+
+
+@functools.lru_cache(maxsize=1)
+def _base_blob(scene_path: str) -> bytes:
+    # One parse per worker process; each variant unpickles a fresh copy, which
+    # is much cheaper than copy.deepcopy on these plain dict/list trees.
+    return pickle.dumps(load_yaml(scene_path), protocol=5)
+
+
+def process_one_variant(scene_path: Path, out_dir: Path, variant: Dict, isolate: bool = False) -> None:
+    scene = SceneIndex(pickle.loads(_base_blob(str(scene_path))))
+    for sid in variant.get("mark_removed", []):
+        scene = remove_symbol_or_text(scene, sid)
+
+    scene, params = apply_ops(scene, variant.get("render_ops", []))
+
+    # The SVG goes straight to the variant's image; other artefacts keep the
+    # names the temp-scene round trip used to give them.
+    tmp_scene = out_dir / f"{scene_path.stem}.{variant['variant_id']}.tmp.yaml"
+    output = out_dir / variant["image"] if variant.get("image") else None
+    if isolate:
+        save_yaml(scene.compact(), tmp_scene)
+        call_renderer(tmp_scene, out_dir, params["rotate"], params["symbol_opacity"], output)
+        tmp_scene.unlink(missing_ok=True)
+    else:
+        render_svg.render_scene(
+            scene.compact(), out_dir, tmp_scene.stem,
+            rotate=params["rotate"], symbol_opacity=params["symbol_opacity"],
+            schema_path=ROOT / "schema" / "scene.schema.json", output=output,
+        )
+
+    # Params retained for forward-compatibility.
+    _ = params
+
+
+def _copy_base(src: Path, dst: Path) -> None:
+    # A real copy: the renderers rewrite files in place, so a shared inode would
+    # let one output overwrite the other. Unlinking first also breaks any
+    # hardlink left behind by older runs.
+    if dst.resolve() == src.resolve():
+        return
+    dst.unlink(missing_ok=True)
+    shutil.copyfile(src, dst)
 
 
 def main() -> None:
@@ -203,41 +352,39 @@ def main() -> None:
     parser.add_argument("--scene", required=True)
     parser.add_argument("--variants", required=True)
     parser.add_argument("--out_dir", required=True)
+    parser.add_argument("--workers", type=int, default=None, help=f"Worker processes (default: CPU count, in-process below {POOL_MIN_ITEMS} edited variants; 1 runs in-process)")
+    parser.add_argument("--isolate", action="store_true", help="Run render_svg.py in a subprocess per variant (debugging)")
     args = parser.parse_args()
 
     scene_path = Path(args.scene)
     out_dir = Path(args.out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    base_scene = load_yaml(scene_path)
     variants = load_json(args.variants)
-
-    for variant in variants:
-        scene = copy.deepcopy(base_scene)
-        for sid in variant.get("mark_removed", []):
-            scene = remove_symbol_or_text(scene, sid)
-
-        scene, params = apply_ops(scene, variant.get("render_ops", []))
-
-        tmp_scene = out_dir / f"{scene_path.stem}.{variant['variant_id']}.tmp.yaml"
-        save_yaml(scene, tmp_scene)
-
-        # Render and rename artefacts when requested.
-        call_renderer(tmp_scene, out_dir, params["rotate"], params["symbol_opacity"])
-
-        if variant.get("image"):
+    process = functools.partial(process_one_variant, scene_path, out_dir, isolate=args.isolate)
+
+    # Variants without edits all show the base figure: render it once and copy it.
+    unedited = [v for v in variants if not v.get("render_ops") and not v.get("mark_removed")]
+    edited = [v for v in variants if v.get("render_ops") or v.get("mark_removed")]
+    if unedited:
+        if args.isolate:
+            call_renderer(scene_path, out_dir, 0.0, 1.0)
             base_svg = out_dir / f"{scene_path.stem}.svg"
-            dst_svg = out_dir / variant["image"]
-            if base_svg.exists():
-                base_svg.replace(dst_svg)
-
-        try:
-            tmp_scene.unlink()
-        except OSError:
-            pass
-
-        # Params retained for forward-compatibility.
-        _ = params
+        else:
+            base_svg = render_svg.render_scene(
+                pickle.loads(_base_blob(str(scene_path))), out_dir, scene_path.stem,
+                schema_path=ROOT / "schema" / "scene.schema.json",
+            )
+        for variant in unedited:
+            if variant.get("image"):
+                _copy_base(base_svg, out_dir / variant["image"])
+
+    if args.workers == 1 or (args.workers is None and len(edited) < POOL_MIN_ITEMS):
+        for variant in edited:
+            process(variant)
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as ex:
+            list(ex.map(process, edited))
 
     print("[make_variants] Done.")
 
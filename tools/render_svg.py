@@ -3,14 +3,16 @@
 Deterministic SVG renderer for geometry scenes.
 
 Usage:
-  python tools/render_svg.py --scene items/T1/scene.yaml --out_dir items/T1 [--rotate 0] [--symbol_opacity 1.0]
+  python tools/render_svg.py --scene items/T1/scene.yaml --out_dir items/T1 [--rotate 0] [--symbol_opacity 1.0] [--output path.svg] [--png_workers N]
 
 - Reads scene.yaml (validates against schema/scene.schema.json if available)
 - Renders layered SVG with stable IDs for primitives, symbols, labels
 - Exports 96/144/300 DPI PNGs (requires cairosvg)
 - Writes PGDP-like annotations (mirrors scene) to <ID>.pgdp.json
+- render() / render_scene() do the same in-process for callers such as make_variants.py
 """
-import os, sys, json, math, argparse, re
+import os, sys, json, argparse, re, functools
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 try:
@@ -18,19 +20,44 @@ try:
 except Exception as e:
     print("Missing dependency: pyyaml", file=sys.stderr); raise
 
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _Loader
+
+try:
+    from tools import _geom_numba
+except ImportError:  # run as a script: tools/ itself is on sys.path
+    import _geom_numba
+
+# label text that is drawn with the bold "measure" class
+_MEASURE_RE = re.compile(r"\d+\s*°")
+
 def load_json(p):
     with open(p, 'r', encoding='utf-8') as f:
         return json.load(f)
 
 def load_yaml(p):
-    with open(p, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+    # binary handle: libyaml reads and decodes the stream itself
+    with open(p, 'rb') as f:
+        return yaml.load(f, Loader=_Loader)
+
+@functools.lru_cache(maxsize=4)
+def _get_validator(schema_path: str):
+    # parsed and checked once per schema file, not once per scene
+    import jsonschema
+    schema = load_json(schema_path)
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
 
 def try_validate_scene(scene, schema_path: Path):
     try:
         import jsonschema
-        schema = load_json(schema_path)
-        jsonschema.validate(scene, schema)
+        validator = _get_validator(str(Path(schema_path).resolve()))
+        error = jsonschema.exceptions.best_match(validator.iter_errors(scene))
+        if error is not None:
+            raise error
     except Exception as e:
         # soft-fail: print but continue
         print(f"[render_svg] Schema validation warning: {e}", file=sys.stderr)
@@ -38,27 +65,27 @@ def try_validate_scene(scene, schema_path: Path):
 def points_dict(scene):
     return {p["id"]: (float(p["x"]), float(p["y"])) for p in scene.get("points",[])}
 
-def find_primitive(scene, pid):
+def index_primitives(scene):
+    # one pass: id -> primitive (first wins on duplicate ids, as the old linear
+    # scan did) and the Line/Circle/Arc primitives in scene order
+    prims = {}
+    buckets = {"Line": [], "Circle": [], "Arc": []}
     for p in scene.get("primitives",[]):
-        if p.get("id")==pid:
-            return p
-    return None
-
-def find_line_pts(scene, line_id):
-    L = find_primitive(scene, line_id)
+        prims.setdefault(p.get("id"), p)
+        bucket = buckets.get(p.get("type"))
+        if bucket is not None:
+            bucket.append(p)
+    return prims, buckets
+
+def find_line_pts(prims, pts, line_id):
+    L = prims.get(line_id)
     if not L or L.get("type")!="Line": return None
-    pts = points_dict(scene)
     return pts[L["p1"]], pts[L["p2"]]
 
 def line_intersection(p1, p2, p3, p4):
     # returns intersection point of lines p1p2 and p3p4
-    x1,y1 = p1; x2,y2 = p2; x3,y3 = p3; x4,y4 = p4
-    den = (x1-x2)*(y3-y4) - (y1-y2)*(x3-x4)
-    if abs(den) < 1e-9:
-        return None
-    px = ((x1*y2 - y1*x2)*(x3-x4) - (x1-x2)*(x3*y4 - y3*x4)) / den
-    py = ((x1*y2 - y1*x2)*(y3-y4) - (y1-y2)*(x3*y4 - y3*x4)) / den
-    return (px,py)
+    px, py, ok = _geom_numba.line_intersection(*p1, *p2, *p3, *p4)
+    return (px,py) if ok else None
 
 def svg_header(width, height, root_id="scene"):
     return f'''<svg id="{root_id}" xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">
@@ -76,207 +103,228 @@ def svg_header(width, height, root_id="scene"):
 def svg_footer():
     return '</svg>\n'
 
-def draw_primitives(scene):
-    pts = points_dict(scene)
+def canvas_size(pts):
     xs = [p[0] for p in pts.values()] + [0,400]; ys = [p[1] for p in pts.values()] + [0,400]
-    width  = int(max(xs)+60); height = int(max(ys)+60)
-    parts = []
-    parts.append('  <g id="primitives">')
-    for prim in scene.get("primitives",[]):
-        if prim["type"]=="Circle":
-            cx,cy = pts[prim["center"]]; r = prim["radius"]
-            parts.append(f'    <circle id="{prim["id"]}" class="prim" cx="{cx}" cy="{cy}" r="{r}" />')
-    for prim in scene.get("primitives",[]):
-        if prim["type"]=="Line":
-            (x1,y1),(x2,y2) = find_line_pts(scene, prim["id"])
-            parts.append(f'    <line id="{prim["id"]}" class="prim" x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" />')
-    for prim in scene.get("primitives",[]):
-        if prim["type"]=="Arc":
-            circle = find_primitive(scene, prim["circle"])
-            cx,cy = pts[circle["center"]]; r = circle["radius"]
-            sx,sy = pts[prim["start"]]; ex,ey = pts[prim["end"]]
-            laf = 1 if abs(prim.get("measure_deg",0)) > 180 else 0
-            swf = 1
-            parts.append(f'    <path id="{prim["id"]}" class="prim" d="M {sx:.3f} {sy:.3f} A {r:.3f} {r:.3f} 0 {laf} {swf} {ex:.3f} {ey:.3f}" />')
-    parts.append('  </g>')
-    return width, height, "\n".join(parts)+"\n"
-
-def unit_vec(dx,dy):
-    n = math.hypot(dx,dy) or 1.0
-    return dx/n, dy/n
+    return int(max(xs)+60), int(max(ys)+60)
+
+# The draw_* functions append newline-terminated SVG fragments to `out`;
+# render_scene joins the whole document once. `pts` is points_dict(scene) and
+# `prims, buckets` is index_primitives(scene), both built once per render.
+
+def draw_primitives(buckets, prims, pts, out):
+    out.append('  <g id="primitives">\n')
+    for prim in buckets["Circle"]:
+        cx,cy = pts[prim["center"]]; r = prim["radius"]
+        out.append(f'    <circle id="{prim["id"]}" class="prim" cx="{cx}" cy="{cy}" r="{r}" />\n')
+    for prim in buckets["Line"]:
+        (x1,y1),(x2,y2) = find_line_pts(prims, pts, prim["id"])
+        out.append(f'    <line id="{prim["id"]}" class="prim" x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" />\n')
+    for prim in buckets["Arc"]:
+        circle = prims.get(prim["circle"])
+        cx,cy = pts[circle["center"]]; r = circle["radius"]
+        sx,sy = pts[prim["start"]]; ex,ey = pts[prim["end"]]
+        laf = 1 if abs(prim.get("measure_deg",0)) > 180 else 0
+        swf = 1
+        out.append(f'    <path id="{prim["id"]}" class="prim" d="M {sx:.3f} {sy:.3f} A {r:.3f} {r:.3f} 0 {laf} {swf} {ex:.3f} {ey:.3f}" />\n')
+    out.append('  </g>\n')
+
+unit_vec = _geom_numba.unit_vec
 
 def perp_vec(dx,dy):
     return -dy, dx
 
-def draw_symbol_angle_arc(scene, sym):
-    pts = points_dict(scene)
+def draw_symbol_angle_arc(prims, pts, sym, out):
     line1, line2, vtx = sym["targets"]
-    (x1a,y1a),(x1b,y1b) = find_line_pts(scene, line1)
-    (x2a,y2a),(x2b,y2b) = find_line_pts(scene, line2)
+    (x1a,y1a),(x1b,y1b) = find_line_pts(prims, pts, line1)
+    (x2a,y2a),(x2b,y2b) = find_line_pts(prims, pts, line2)
     vx,vy = pts[vtx]
-    v1 = unit_vec(x1a - vx, y1a - vy) if (x1a,y1a)!=(vx,vy) else unit_vec(x1b - vx, y1b - vy)
-    v2 = unit_vec(x2a - vx, y2a - vy) if (x2a,y2a)!=(vx,vy) else unit_vec(x2b - vx, y2b - vy)
     r = 18.0
-    s = (vx + v1[0]*r, vy + v1[1]*r)
-    e = (vx + v2[0]*r, vy + v2[1]*r)
-    cross = v1[0]*v2[1] - v1[1]*v2[0]
-    swf = 1 if cross>0 else 0
-    path = f'M {s[0]:.1f} {s[1]:.1f} A {r:.1f} {r:.1f} 0 0 {swf} {e[0]:.1f} {e[1]:.1f}'
-    return f'    <path id="{sym["id"]}" class="sym" d="{path}" />'
-
-def draw_symbol_perpendicular(scene, sym):
+    sx,sy,ex,ey,swf = _geom_numba.angle_arc_endpoints(vx, vy, x1a, y1a, x1b, y1b, x2a, y2a, x2b, y2b, r)
+    path = f'M {sx:.1f} {sy:.1f} A {r:.1f} {r:.1f} 0 0 {swf} {ex:.1f} {ey:.1f}'
+    out.append(f'    <path id="{sym["id"]}" class="sym" d="{path}" />\n')
+
+def draw_symbol_perpendicular(prims, pts, sym, out):
     line1, line2 = sym["targets"][0], sym["targets"][1]
-    (a1,a2) = find_line_pts(scene, line1)
-    (b1,b2) = find_line_pts(scene, line2)
+    (a1,a2) = find_line_pts(prims, pts, line1)
+    (b1,b2) = find_line_pts(prims, pts, line2)
     p = line_intersection(a1,a2,b1,b2) or a2
     sz = 8.0; x = p[0]-sz/2; y = p[1]-sz/2
-    return f'    <rect id="{sym["id"]}" class="sym" x="{x:.1f}" y="{y:.1f}" width="{sz:.1f}" height="{sz:.1f}" />'
-
-def draw_symbol_parallel(scene, sym):
-    def chevrons_for_line(line_id, sym_id_suffix):
-        pts = find_line_pts(scene, line_id)
-        if not pts:
-            return ""
-        (p1, p2) = pts
+    out.append(f'    <rect id="{sym["id"]}" class="sym" x="{x:.1f}" y="{y:.1f}" width="{sz:.1f}" height="{sz:.1f}" />\n')
+
+def draw_symbol_parallel(prims, pts, sym, out):
+    start = len(out)
+    for idx, line_id in enumerate(sym.get("targets", [])):
+        seg = find_line_pts(prims, pts, line_id)
+        if not seg:
+            continue
+        suffix = f"{sym['id']}_{idx}"
+        (p1, p2) = seg
         dx, dy = (p2[0] - p1[0], p2[1] - p1[1])
         ux, uy = unit_vec(dx, dy)
         nx, ny = unit_vec(*perp_vec(dx, dy))
         midx = (p1[0] + p2[0]) / 2
         midy = (p1[1] + p2[1]) / 2
         length = 10.0
-        parts = []
         for i in (-1, 1):
             ax = midx + nx * i * 5
             ay = midy + ny * i * 5
             bx = ax + ux * length
             by = ay + uy * length
-            parts.append(
-                f'    <line id="{sym_id_suffix}_{i}" class="sym" x1="{ax:.1f}" y1="{ay:.1f}" x2="{bx:.1f}" y2="{by:.1f}" />'
+            out.append(
+                f'    <line id="{suffix}_{i}" class="sym" x1="{ax:.1f}" y1="{ay:.1f}" x2="{bx:.1f}" y2="{by:.1f}" />\n'
             )
-        return "\n".join(parts)
-
-    lines = sym.get("targets", [])
-    parts = []
-    for idx, line_id in enumerate(lines):
-        suffix = f"{sym['id']}_{idx}"
-        chunk = chevrons_for_line(line_id, suffix)
-        if chunk:
-            parts.append(chunk)
-    return "\n".join(parts)
+    if len(out) == start:
+        out.append('\n')  # a symbol with no drawable lines has always left a blank line
 
-def draw_symbol_tangent(scene, sym):
+def draw_symbol_tangent(prims, pts, sym, out):
     line_id, point_id = sym["targets"][0], sym["targets"][1]
-    pts = points_dict(scene); x,y = pts[point_id]
-    return f'    <text id="{sym["id"]}" class="lbl" x="{x+10:.1f}" y="{y-10:.1f}">⊥</text>'
+    x,y = pts[point_id]
+    out.append(f'    <text id="{sym["id"]}" class="lbl" x="{x+10:.1f}" y="{y-10:.1f}">⊥</text>\n')
 
-def draw_symbol_tick_bar(scene, sym):
+def draw_symbol_tick_bar(prims, pts, sym, out):
     line_id = sym["targets"][0]
-    (p1,p2) = find_line_pts(scene, line_id)
+    (p1,p2) = find_line_pts(prims, pts, line_id)
     dx,dy = (p2[0]-p1[0], p2[1]-p1[1])
     ux,uy = unit_vec(dx,dy); nx,ny = unit_vec(*perp_vec(dx,dy))
     midx = (p1[0]+p2[0])/2; midy = (p1[1]+p2[1])/2
     L = 10.0
     ax = midx + nx*L/2; ay = midy + ny*L/2
     bx = midx - nx*L/2; by = midy - ny*L/2
-    return f'    <line id="{sym["id"]}" class="sym" x1="{ax:.1f}" y1="{ay:.1f}" x2="{bx:.1f}" y2="{by:.1f}" />'
+    out.append(f'    <line id="{sym["id"]}" class="sym" x1="{ax:.1f}" y1="{ay:.1f}" x2="{bx:.1f}" y2="{by:.1f}" />\n')
 
-def draw_symbols(scene, opacity=1.0):
-    parts = [f'  <g id="symbols" opacity="{opacity}">']
+def draw_symbols(scene, prims, pts, out, opacity=1.0):
+    out.append(f'  <g id="symbols" opacity="{opacity}">\n')
     for sym in scene.get("symbols",[]):
         t = sym.get("type")
         if t=="angle_arc":
-            parts.append(draw_symbol_angle_arc(scene, sym))
+            draw_symbol_angle_arc(prims, pts, sym, out)
         elif t=="perpendicular":
-            parts.append(draw_symbol_perpendicular(scene, sym))
+            draw_symbol_perpendicular(prims, pts, sym, out)
         elif t=="parallel":
-            parts.append(draw_symbol_parallel(scene, sym))
+            draw_symbol_parallel(prims, pts, sym, out)
         elif t=="tangent_mark":
-            parts.append(draw_symbol_tangent(scene, sym))
+            draw_symbol_tangent(prims, pts, sym, out)
         elif t=="tick_bar":
-            parts.append(draw_symbol_tick_bar(scene, sym))
-    parts.append('  </g>')
-    return "\n".join(parts)+"\n"
+            draw_symbol_tick_bar(prims, pts, sym, out)
+    out.append('  </g>\n')
 
-def draw_labels(scene):
-    pts = points_dict(scene)
-    parts = ['  <g id="labels">']
+def draw_labels(scene, pts, out):
+    out.append('  <g id="labels">\n')
     for pid, (x,y) in pts.items():
-        parts.append(f'    <circle id="pt_{pid}" class="pt" cx="{x:.1f}" cy="{y:.1f}" r="3" />')
+        out.append(f'    <circle id="pt_{pid}" class="pt" cx="{x:.1f}" cy="{y:.1f}" r="3" />\n')
     for txt in scene.get("texts", []):
         anchor = txt.get("anchor")
         if anchor not in pts:
             continue
         x, y = pts[anchor]
         content = txt["string"]
-        klass = "measure" if re.search(r"\d+\s*°", content) else "lbl"
+        klass = "measure" if _MEASURE_RE.search(content) else "lbl"
         base_dx, base_dy = (-28.0, -10.0) if klass == "measure" else (8.0, -8.0)
         offset = txt.get("offset", [0.0, 0.0])
         if not (isinstance(offset, list) and len(offset) >= 2):
             offset = [0.0, 0.0]
         dx = base_dx + offset[0]
         dy = base_dy + offset[1]
-        parts.append(
-            f'    <text id="{txt["id"]}" class="{klass}" x="{x+dx:.1f}" y="{y+dy:.1f}">{content}</text>'
+        out.append(
+            f'    <text id="{txt["id"]}" class="{klass}" x="{x+dx:.1f}" y="{y+dy:.1f}">{content}</text>\n'
         )
-    parts.append('  </g>')
-    return "\n".join(parts)+"\n"
+    out.append('  </g>\n')
 
-def wrap_rotation(svg_inner, width, height, angle_deg=0.0):
+def rotation_group(width, height, angle_deg=0.0):
+    """Opening/closing tags of the rotation wrapper (empty when not rotated)."""
     if not angle_deg:
-        return svg_inner
+        return "", ""
     cx,cy = width/2.0, height/2.0
-    return f'  <g id="rot" transform="rotate({angle_deg:.2f} {cx:.1f} {cy:.1f})">\n' + svg_inner + '  </g>\n'
+    return f'  <g id="rot" transform="rotate({angle_deg:.2f} {cx:.1f} {cy:.1f})">\n', '  </g>\n'
+
+PNG_DPIS = [("96",96),("144",144),("300",300)]
 
-def export_pngs(svg_path: Path, base_name: str):
+def _rasterize(svg_bytes: bytes, out_file: str, dpi: int) -> str:
+    # module level so ProcessPoolExecutor can pickle it; each job parses its own tree
+    from cairosvg.parser import Tree
+    from cairosvg.surface import PNGSurface
+    PNGSurface(Tree(bytestring=svg_bytes), out_file, dpi).finish()
+    return out_file
+
+def export_pngs(svg_bytes: bytes, base_path: Path, workers=1):
+    """Rasterize svg_bytes to <base_path>_<dpi>.png; workers=None uses one process per DPI."""
     try:
-        import cairosvg
+        from cairosvg.parser import Tree
+        from cairosvg.surface import PNGSurface
     except Exception as e:
         print("[render_svg] CairoSVG not available; skipping PNG export", file=sys.stderr)
-        return
-    svg_data = Path(svg_path).read_text(encoding='utf-8')
-    for tag, dpi in [("96",96),("144",144),("300",300)]:
-        out = svg_path.with_name(f"{base_name}_{tag}.png")
-        cairosvg.svg2png(bytestring=svg_data.encode("utf-8"), write_to=str(out), dpi=dpi)
-
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--scene", required=True, help="Path to scene.yaml")
-    ap.add_argument("--out_dir", required=True, help="Output directory (will be created)")
-    ap.add_argument("--rotate", type=float, default=0.0, help="Rotate entire figure by degrees")
-    ap.add_argument("--symbol_opacity", type=float, default=1.0, help="Opacity for symbol layer (0..1)")
-    args = ap.parse_args()
-
-    scene = load_yaml(args.scene)
-    schema_path = Path("schema/scene.schema.json")
+        return []
+    base_path = Path(base_path)
+    outs = [str(base_path.with_name(f"{base_path.name}_{tag}.png")) for tag, _ in PNG_DPIS]
+    dpis = [dpi for _, dpi in PNG_DPIS]
+    if workers == 1 or len(dpis) == 1:
+        # parse the document once and rasterize that tree at each DPI
+        # (cairosvg.svg2png would re-parse the SVG for every call)
+        tree = Tree(bytestring=svg_bytes)
+        for out, dpi in zip(outs, dpis):
+            PNGSurface(tree, out, dpi).finish()
+        return outs
+    with ProcessPoolExecutor(max_workers=workers or len(dpis)) as ex:
+        return list(ex.map(_rasterize, [svg_bytes] * len(dpis), outs, dpis))
+
+def render(scene_path, out_dir, rotate=0.0, symbol_opacity=1.0, schema_path=Path("schema/scene.schema.json"), output=None, png_workers=1) -> Path:
+    """Render one scene file to <stem>.svg (or output), <stem>.pgdp.json and PNGs under out_dir."""
+    return render_scene(load_yaml(scene_path), out_dir, Path(scene_path).stem,
+                        rotate=rotate, symbol_opacity=symbol_opacity, schema_path=schema_path, output=output,
+                        png_workers=png_workers)
+
+def render_scene(scene, out_dir, base_name, rotate=0.0, symbol_opacity=1.0, schema_path=Path("schema/scene.schema.json"), output=None, png_workers=1) -> Path:
+    """Render an already-loaded scene dict to <base_name>.svg (or output) etc. under out_dir.
+
+    PNG export stays in-process by default since batch callers already fan out per scene.
+    """
+    schema_path = Path(schema_path)
     if schema_path.exists():
         try_validate_scene(scene, schema_path)
 
-    width, height, prim_svg = draw_primitives(scene)
-    sym_svg = draw_symbols(scene, opacity=args.symbol_opacity)
-    lbl_svg = draw_labels(scene)
-
-    inner = prim_svg + sym_svg + lbl_svg
-    rotated_inner = wrap_rotation(inner, width, height, args.rotate)
-    svg = svg_header(width, height, root_id=Path(args.scene).stem) + rotated_inner + svg_footer()
-
-    out_dir = Path(args.out_dir); out_dir.mkdir(parents=True, exist_ok=True)
-    base_name = Path(args.scene).stem
-    svg_path = out_dir / f"{base_name}.svg"
-    svg_path.write_text(svg, encoding='utf-8')
+    pts = points_dict(scene)
+    prims, buckets = index_primitives(scene)
+    width, height = canvas_size(pts)
+    rot_open, rot_close = rotation_group(width, height, rotate)
+    parts = [svg_header(width, height, root_id=base_name), rot_open]
+    draw_primitives(buckets, prims, pts, parts)
+    draw_symbols(scene, prims, pts, parts, opacity=symbol_opacity)
+    draw_labels(scene, pts, parts)
+    parts += [rot_close, svg_footer()]
+    svg_bytes = "".join(parts).encode("utf-8")
+
+    out_dir = Path(out_dir); out_dir.mkdir(parents=True, exist_ok=True)
+    svg_path = Path(output) if output else out_dir / f"{base_name}.svg"
+    svg_path.parent.mkdir(parents=True, exist_ok=True)
+    svg_path.write_bytes(svg_bytes)
 
     pgdp = {
         "points": scene.get("points",[]),
-        "lines": [p for p in scene.get("primitives",[]) if p.get("type")=="Line"],
-        "circles": [p for p in scene.get("primitives",[]) if p.get("type")=="Circle"],
-        "arcs": [p for p in scene.get("primitives",[]) if p.get("type")=="Arc"],
+        "lines": buckets["Line"],
+        "circles": buckets["Circle"],
+        "arcs": buckets["Arc"],
         "symbols": scene.get("symbols",[]),
         "texts": scene.get("texts",[]),
         "relations": scene.get("relations",[])
     }
     (out_dir / f"{base_name}.pgdp.json").write_text(json.dumps(pgdp, indent=2), encoding="utf-8")
 
-    export_pngs(svg_path, base_name)
+    # rasterize the in-memory document rather than reading the file back
+    export_pngs(svg_bytes, svg_path.with_name(base_name), workers=png_workers)
     print(f"[render_svg] Wrote {svg_path} and PNGs to {out_dir}")
+    return svg_path
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scene", required=True, help="Path to scene.yaml")
+    ap.add_argument("--out_dir", required=True, help="Output directory (will be created)")
+    ap.add_argument("--rotate", type=float, default=0.0, help="Rotate entire figure by degrees")
+    ap.add_argument("--symbol_opacity", type=float, default=1.0, help="Opacity for symbol layer (0..1)")
+    ap.add_argument("--output", default=None, help="SVG path to write (default: <out_dir>/<scene stem>.svg)")
+    ap.add_argument("--png_workers", type=int, default=None, help="Processes for PNG export (default: one per DPI; 1 runs in-process)")
+    args = ap.parse_args()
+    render(args.scene, args.out_dir, rotate=args.rotate, symbol_opacity=args.symbol_opacity, output=args.output,
+           png_workers=args.png_workers)
 
 if __name__ == "__main__":
     main()
@@ -3,10 +3,11 @@ r"""Grounding validator for geometry benchmark assets.
 
 Checks performed:
 
-* ``scene.yaml`` (if present) validates against ``schema/scene.schema.json``.
+* ``scene.yaml`` (if present) validates against ``schema/scene.schema.json``
+  (with ``fastjsonschema`` when installed, otherwise ``jsonschema``).
 * Every symbol defined in the scene has a corresponding ``sym2geo`` relation.
-* Any text string that resembles a measurement (matches ``\d+°`` or
-  ``=\s*\d+``) has a ``text2geo`` relation.
+* Any text string that resembles a measurement (matches ``[0-9]+°`` or
+  ``=\s*[0-9]+``, ASCII digits) has a ``text2geo`` relation.
 * Variants declaring ``expected_effect: "flip_or_invalidate"`` reference a
   decisive symbol that exists in the base scene (symbol or text ID).
 """
@@ -14,98 +15,300 @@ Checks performed:
 from __future__ import annotations
 
 import argparse
+import functools
+import hashlib
+import heapq
+import itertools
 import json
+import os
 import re
+from bisect import bisect_right
 from pathlib import Path
 
-import yaml
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None
+
+# yaml and the schema libraries are imported on first use (_yaml(),
+# build_schema_checker) so that --help and modules that only import this one
+# skip their ~60ms of import time.
 
 try:
-    import jsonschema
-except Exception:  # pragma: no cover - optional dependency
-    jsonschema = None
+    import re2 as _measure_re
+except ImportError:  # optional linear-time engine (google-re2); stdlib re otherwise
+    _measure_re = re
+
+
+# Unbound dict.get for the per-relation/per-text loops: skips the method lookup.
+_get = dict.get
+
+# Error messages list at most this many IDs per problem.
+ERROR_ID_LIMIT = 20
+
+# Below this many items the default run skips the process pool: startup costs more.
+POOL_MIN_ITEMS = 4
+
+# ASCII digits and whitespace only, under either engine: re2 is ASCII-only already,
+# and re.ASCII keeps stdlib re off its Unicode category tables.
+_MEASURE_SOURCE = r"[0-9]+\s*°|=\s*[0-9]+"
+MEASURE_PATTERN = (
+    re.compile(_MEASURE_SOURCE, re.ASCII) if _measure_re is re else _measure_re.compile(_MEASURE_SOURCE)
+)
 
 
-MEASURE_PATTERN = re.compile(r"(\d+\s*°|=\s*\d+)")
+def measure_text_ids(texts) -> set:
+    """IDs of the texts whose string matches MEASURE_PATTERN, found in one scan."""
+    strings = [_get(text, "string", "") for text in texts]
+    # NUL is neither a digit, whitespace, "°" nor "=", so no match spans two texts.
+    joined = "\0".join(strings)
+    # Every match contains "°" or "=": scenes of plain labels never reach the regex.
+    if "°" not in joined and "=" not in joined:
+        return set()
+    starts = list(itertools.accumulate((len(string) + 1 for string in strings[:-1]), initial=0))
+    return {texts[bisect_right(starts, match.start()) - 1]["id"] for match in MEASURE_PATTERN.finditer(joined)}
+
+
+def format_ids(ids) -> str:
+    """The smallest ERROR_ID_LIMIT IDs as a sorted list, plus a count of the rest."""
+    shown = heapq.nsmallest(ERROR_ID_LIMIT, ids)
+    extra = len(ids) - len(shown)
+    return f"{shown} (+{extra} more)" if extra else str(shown)
 
 
 def load_json(path: Path):
-    with path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    # json.loads detects UTF-8 in bytes itself
+    return json.loads(path.read_bytes())
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml():
+    # (yaml module, loader class), imported once; CSafeLoader needs PyYAML built with libyaml
+    import yaml
+
+    return yaml, getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 def load_yaml(path: Path):
-    with path.open("r", encoding="utf-8") as handle:
-        return yaml.safe_load(handle)
+    yaml, loader = _yaml()
+    # one read into bytes; libyaml decodes the UTF-8 in C
+    return yaml.load(path.read_bytes(), Loader=loader)
+
+
+def load_schema_bytes(schema_path: Path):
+    return schema_path.read_bytes() if schema_path.exists() else None
+
+
+# blake2b(schema bytes) -> check; an edited schema file gets a fresh checker
+_CHECKER_CACHE: dict = {}
+
+
+def schema_checker(schema_path: Path):
+    """build_schema_checker() for a schema file, memoised on the file's contents."""
+    return checker_for_schema_bytes(load_schema_bytes(schema_path))
+
+
+def checker_for_schema_bytes(data):
+    """build_schema_checker() for raw schema JSON (or None), built once per distinct schema."""
+    if data is None:
+        return None
+    key = hashlib.blake2b(data, digest_size=16).digest()
+    if key not in _CHECKER_CACHE:
+        _CHECKER_CACHE[key] = build_schema_checker(orjson.loads(data) if orjson is not None else json.loads(data))
+    return _CHECKER_CACHE[key]
+
+
+def build_schema_checker(schema):
+    """``check(scene, scene_path)`` for a parsed schema.
+
+    Returns None when there is no schema or neither validation library is installed.
+    """
+    if schema is None:
+        return None
+
+    try:
+        import fastjsonschema
+    except ImportError:  # optional: compiled validation, jsonschema is used otherwise
+        fastjsonschema = None
+    try:
+        import jsonschema
+    except Exception:  # pragma: no cover - optional dependency
+        jsonschema = None
+
+    if fastjsonschema:
+        compiled = fastjsonschema.compile(schema)
+
+        def check(scene, scene_path):
+            try:
+                compiled(scene)
+            except fastjsonschema.JsonSchemaException as exc:
+                raise AssertionError(f"Schema violation in {scene_path}: {exc.message}") from None
+
+        return check
+
+    if jsonschema:
+        cls = jsonschema.validators.validator_for(schema)
+        cls.check_schema(schema)
+        validator = cls(schema)
+
+        def check(scene, scene_path):
+            # Same error jsonschema.validate() would raise.
+            error = jsonschema.exceptions.best_match(validator.iter_errors(scene))
+            if error is not None:
+                raise error
+
+        return check
+
+    return None
 
 
 def validate_scene(scene_path: Path, schema_path: Path):
-    scene = load_yaml(scene_path)
+    validate_scene_data(load_yaml(scene_path), scene_path, schema_checker(schema_path))
+
+
+def validate_scene_data(scene: dict, scene_path: Path, check=None) -> set:
+    """validate_scene for an already-parsed scene and a prebuilt schema_checker() (or None).
 
-    if schema_path.exists() and jsonschema:
-        schema = load_json(schema_path)
-        jsonschema.validate(scene, schema)
+    Returns the scene's symbol IDs so validate_variants_data can reuse them. Linking
+    problems are collected and raised together as one AssertionError.
+    """
+    if check is not None:
+        check(scene, scene_path)
 
-    relations = scene.get("relations", [])
-    sym_ids = {sym["id"] for sym in scene.get("symbols", [])}
-    linked_symbols = {rel["symbol_id"] for rel in relations if rel.get("type") == "sym2geo"}
+    # one pass over the relations fills both link sets
+    linked_symbols, linked_texts = set(), set()
+    for rel in scene.get("relations", ()):
+        rel_type = _get(rel, "type")
+        if rel_type == "sym2geo":
+            linked_symbols.add(rel["symbol_id"])
+        elif rel_type == "text2geo":
+            linked_texts.add(rel["text_id"])
+
+    errors = []
+    sym_ids = {sym["id"] for sym in scene.get("symbols", ())}
     missing_symbols = sym_ids - linked_symbols
     if missing_symbols:
-        raise AssertionError(f"Unlinked symbols in {scene_path}: {sorted(missing_symbols)}")
-
-    texts = scene.get("texts", [])
-    measure_text_ids = {
-        text["id"]
-        for text in texts
-        if MEASURE_PATTERN.search(text.get("string", ""))
-    }
-    linked_texts = {rel["text_id"] for rel in relations if rel.get("type") == "text2geo"}
-    missing_measures = measure_text_ids - linked_texts
+        errors.append(f"Unlinked symbols in {scene_path}: {format_ids(missing_symbols)}")
+
+    missing_measures = measure_text_ids(scene.get("texts", ())) - linked_texts
     if missing_measures:
-        raise AssertionError(f"Unlinked measure texts in {scene_path}: {sorted(missing_measures)}")
+        errors.append(f"Unlinked measure texts in {scene_path}: {format_ids(missing_measures)}")
+
+    if errors:
+        raise AssertionError("\n".join(errors))
+    return sym_ids
 
 
 def validate_variants(scene_path: Path, variants_path: Path):
-    scene = load_yaml(scene_path)
+    validate_variants_data(load_yaml(scene_path), scene_path, variants_path)
+
+
+def validate_variants_data(scene: dict, scene_path: Path, variants_path: Path, symbol_ids=None):
+    """validate_variants against an already-parsed base scene (and its symbol IDs, if known).
+
+    Every offending variant is reported in one AssertionError.
+    """
     variants = load_json(variants_path)
 
-    symbol_ids = {sym["id"] for sym in scene.get("symbols", [])}
-    text_ids = {text["id"] for text in scene.get("texts", [])}
+    if symbol_ids is None:
+        symbol_ids = {sym["id"] for sym in scene.get("symbols", [])}
+    # decisive_symbol may name a symbol or a text: one membership test per variant
+    valid_refs = frozenset(symbol_ids).union(text["id"] for text in scene.get("texts", []))
 
+    errors = []
     for variant in variants:
         if variant.get("expected_effect") == "flip_or_invalidate":
             decisive = variant.get("decisive_symbol")
             if not decisive:
-                raise AssertionError(
+                errors.append(
                     f"Variant {variant.get('variant_id')} is missing decisive_symbol despite flip_or_invalidate"
                 )
-            if decisive not in symbol_ids and decisive not in text_ids:
-                raise AssertionError(
+            elif decisive not in valid_refs:
+                errors.append(
                     f"Variant {variant.get('variant_id')} references decisive_symbol '{decisive}'"
                     f" not present in base scene {scene_path}"
                 )
 
+    if errors:
+        raise AssertionError("\n".join(errors))
+
+
+def validate_item(scene_path: Path, variants_path: Path, check=None):
+    has_scene, has_variants = scene_path.exists(), variants_path.exists()
+    # Parsed once for both checks (variants without a scene still fail on the load).
+    scene = load_yaml(scene_path) if has_scene or has_variants else None
+
+    symbol_ids = None
+    if has_scene:
+        symbol_ids = validate_scene_data(scene, scene_path, check)
+
+    if has_variants:
+        validate_variants_data(scene, scene_path, variants_path, symbol_ids)
+
+
+_worker_check = None
+
+
+def _init_worker(schema_bytes) -> None:
+    # Each pool process compiles the schema main already read, once.
+    global _worker_check
+    _worker_check = checker_for_schema_bytes(schema_bytes)
+
+
+def _item_ok(job) -> bool:
+    # Worker side: a pass/fail flag only, since jsonschema errors do not pickle.
+    try:
+        validate_item(*job, _worker_check)
+    except Exception:
+        return False
+    return True
+
 
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--items_dir", default="items")
     parser.add_argument("--schema_dir", default="schema")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help=f"Worker processes (default: CPU count, in-process below {POOL_MIN_ITEMS} items; 1 runs in-process)",
+    )
     args = parser.parse_args()
 
     items_dir = Path(args.items_dir)
     schema_dir = Path(args.schema_dir)
     schema_path = schema_dir / "scene.schema.json"
 
-    for item_dir in sorted(p for p in items_dir.iterdir() if p.is_dir()):
-        scene_path = item_dir / "scene.yaml"
-        variants_path = item_dir / f"{item_dir.name}.variants.json"
+    # DirEntry.is_dir() uses the type from the directory read: no stat per entry.
+    with os.scandir(items_dir) as entries:
+        item_names = sorted(entry.name for entry in entries if entry.is_dir())
+    jobs = [
+        (items_dir / name / "scene.yaml", items_dir / name / f"{name}.variants.json")
+        for name in item_names
+    ]
+
+    # The schema file is read once here, not per item.
+    schema_bytes = load_schema_bytes(schema_path)
+    check = checker_for_schema_bytes(schema_bytes)
 
-        if scene_path.exists():
-            print(f"[validate] {scene_path}")
-            validate_scene(scene_path, schema_path)
+    if args.workers == 1 or (args.workers is None and len(jobs) < POOL_MIN_ITEMS):
+        for scene_path, variants_path in jobs:
+            if scene_path.exists():
+                print(f"[validate] {scene_path}")
+            validate_item(scene_path, variants_path, check)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
 
-        if variants_path.exists():
-            validate_variants(scene_path, variants_path)
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(schema_bytes,)) as executor:
+            for job, ok in zip(jobs, executor.map(_item_ok, jobs)):
+                if job[0].exists():
+                    print(f"[validate] {job[0]}")
+                if not ok:
+                    # Re-run the failing item here to raise its original error.
+                    validate_item(*job, check)
 
     print("[validate] OK")
 